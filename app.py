@@ -11,8 +11,8 @@ sys.path.insert(0, str(Path(__file__).parent / "flashcard_pipeline"))
 sys.path.insert(0, str(Path(__file__).parent / "news_pipeline"))
 
 # Import functions directly from modules
-from news_pipeline.main import get_all_news
-from flashcard_pipeline.main import main as run_flashcard_pipeline
+from pipeline import stream_pipeline, precomputed_articles
+from embeddings.embedder import warmup
 
 # Page configuration
 st.set_page_config(
@@ -21,6 +21,14 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Load the embedding model in the background once per server process,
+# so the first search does not wait for it
+@st.cache_resource
+def start_model_warmup():
+    return warmup(background=True)
+
+start_model_warmup()
+
 # Custom CSS for better styling
 st.markdown("""
     <style>
@@ -118,6 +126,28 @@ if 'keyword_searched' not in st.session_state:
 if 'flashcards' not in st.session_state:
     st.session_state.flashcards = None
 
+def render_flashcard(idx, flashcard):
+    with st.container():
+        st.markdown(f"""
+        <div class="article-card">
+            <div class="article-title">{idx}. {flashcard['title']}</div>
+            <div class="article-meta">
+                <strong>Question:</strong> {flashcard['question']} |                    
+                <strong>Answer:</strong> {flashcard['answer']} |
+                <strong>Context:</strong> {flashcard['context']} |
+                <strong>Company:</strong> {flashcard['the_company_mainly_concerned_with_the_news_article']} |
+                <strong>Source:</strong> {flashcard['source']} |
+                <strong>Published:</strong> {flashcard['published_at']}
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+        # Show article metadata
+        with st.expander("Article Details"):
+            st.markdown(f"**Title:** {flashcard['title']}")
+            st.markdown(f"**Summary:** {flashcard['summary']}")
+            st.link_button("Read Full Article", flashcard['link'])
+
 # Results section
 if search_button:
     if not keyword.strip():
@@ -125,41 +155,45 @@ if search_button:
     else:
         with st.spinner(f"Searching for '{keyword}'..."):
             try:
-                # Create progress indicators
                 progress_text = st.empty()
-                progress_bar = st.progress(0)
-                
-                progress_text.text("Fetching articles from sources...")
-                progress_bar.progress(20)
-                
-                results = get_all_news(keyword)
-
-                # Remove embeddings — they are NumPy arrays, not JSON-serializable
-                for article in results:
-                    article.pop("embedding", None)
-
-                # Save results to resultsgen.json
-                with open("resultsgen.json", "w") as f:
-                    json.dump(results, f, indent=2)
 
-                # Run flashcard pipeline
-                progress_text.text("Generating flashcards...")
-                progress_bar.progress(60)
-                run_flashcard_pipeline()
-                progress_bar.progress(80)
-
-                # Load flashcards
-                with open("flashcards.json", "r") as f:
-                    flashcards = json.load(f)
+                # Topics polled by the daemon are served from its store
+                # instead of querying the three APIs again
+                stored = precomputed_articles(keyword)
+                if stored is not None:
+                    progress_text.text("Using articles precomputed by the polling daemon...")
+                else:
+                    progress_text.text("Fetching articles from sources...")
+
+                # Flashcards are shown as each article comes through; the
+                # live view is replaced by the full results below once done.
+                # Nothing is written to disk unless PIPELINE_OUTPUT_DIR is set.
+                results, flashcards, shown = [], [], 0
+                live = st.empty()
+                with live.container():
+                    for article, cards in stream_pipeline(keyword, articles=stored):
+                        results.append(article)
+                        flashcards.append(cards)
+                        progress_text.text(f"Generated flashcards for {len(flashcards)} "
+                                           f"articles, looking for more...")
+                        for card in cards['flashcards']:
+                            shown += 1
+                            render_flashcard(shown, card)
+                live.empty()
+
+                # Arrival order is only for the live view; the full results
+                # are shown in rank order, as before streaming
+                ranked = sorted(zip(results, flashcards),
+                                key=lambda pair: pair[0].get("score", 0.0), reverse=True)
+                results = [article for article, _ in ranked]
+                flashcards = [cards for _, cards in ranked]
 
                 # Store in session state
                 st.session_state.results = results
                 st.session_state.flashcards = flashcards
                 st.session_state.keyword_searched = keyword
 
-                progress_bar.progress(100)
                 progress_text.empty()
-                progress_bar.empty()
                 
             except Exception as e:
                 st.error(f"An error occurred: {str(e)}")
@@ -195,26 +229,7 @@ if st.session_state.flashcards is not None:
 
     # Display flashcards
     for idx, flashcard in enumerate(filtered_flashcards, 1):
-        with st.container():
-            st.markdown(f"""
-            <div class="article-card">
-                <div class="article-title">{idx}. {flashcard['title']}</div>
-                <div class="article-meta">
-                    <strong>Question:</strong> {flashcard['question']} |                    
-                    <strong>Answer:</strong> {flashcard['answer']} |
-                    <strong>Context:</strong> {flashcard['context']} |
-                    <strong>Company:</strong> {flashcard['the_company_mainly_concerned_with_the_news_article']} |
-                    <strong>Source:</strong> {flashcard['source']} |
-                    <strong>Published:</strong> {flashcard['published_at']}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-
-            # Show article metadata
-            with st.expander("Article Details"):
-                st.markdown(f"**Title:** {flashcard['title']}")
-                st.markdown(f"**Summary:** {flashcard['summary']}")
-                st.link_button("Read Full Article", flashcard['link'])
+        render_flashcard(idx, flashcard)
 
 
     # Export option
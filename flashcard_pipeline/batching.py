@@ -0,0 +1,46 @@
+"""
+Packing several articles into one LLM request and splitting the answer
+back into per-article results.
+"""
+# Rough English average; good enough to size packs, not to bill by
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(article):
+    return len(str(article)) // CHARS_PER_TOKEN + 1
+
+def pack_articles(articles, token_budget, max_articles):
+    """
+    Split article positions into consecutive packs whose estimated tokens
+    stay within `token_budget`, at most `max_articles` each. An article
+    over budget on its own gets a pack to itself.
+    """
+    packs, pack, used = [], [], 0
+    for i, article in enumerate(articles):
+        tokens = estimate_tokens(article)
+        if pack and (used + tokens > token_budget or len(pack) >= max_articles):
+            packs.append(pack)
+            pack, used = [], 0
+        pack.append(i)
+        used += tokens
+    if pack:
+        packs.append(pack)
+    return packs
+
+def format_pack(articles):
+    """The {articles} block of BATCH_FLASHCARD_PROMPT."""
+    return "\n\n".join(f"ARTICLE [{i}]:\n{article}" for i, article in enumerate(articles))
+
+def split_output(output, size):
+    """
+    {position in pack: flashcard drafts} for the articles of a pack of
+    `size` that came back under a valid, unique article_index with at
+    least one card. Anything missing is for the caller to retry.
+    """
+    counts = {}
+    for entry in output.articles:
+        counts[entry.article_index] = counts.get(entry.article_index, 0) + 1
+    return {
+        entry.article_index: entry.flashcards for entry in output.articles
+        if 0 <= entry.article_index < size and counts[entry.article_index] == 1
+        and entry.flashcards
+    }
@@ -0,0 +1,127 @@
+"""
+Measure what backfilling metadata saves in LLM output, replaying a
+flashcards.json fixture through a fake chat model whose latency grows
+with the tokens it emits.
+
+    python -m flashcard_pipeline.bench.backfill [--fixture flashcards.json]
+        [--tokens-per-second 400] [--concurrency 4]
+
+Each fixture entry is one article (rebuilt from its first card). The
+"full" run has the model emit whole Flashcards, as before; the "slim" run
+goes through FlashcardGenerator, where the model only emits drafts and
+the rest is backfilled. Also checks that backfilled output has exactly the
+fixture's fields, and counts fixture cards whose copied metadata had
+drifted from their article.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+from ..batching import CHARS_PER_TOKEN
+from ..flashcard_generator import FlashcardGenerator
+from ..schema import FlashcardOutput, FlashcardDraft
+from ..prompts import FLASHCARD_PROMPT
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+METADATA = ("link", "source", "summary", "published_at")
+
+def output_tokens(output):
+    return len(output.model_dump_json()) // CHARS_PER_TOKEN + 1
+
+class ReplayChatModel:
+    """
+    Stands in for ChatOllama: answers each article with its fixture cards
+    (as Flashcards or drafts, depending on the schema asked for), after
+    sleeping as long as emitting that output would take.
+    """
+
+    def __init__(self, fixture, tokens_per_second):
+        self.fixture = fixture
+        self.tokens_per_second = tokens_per_second
+        self.tokens = 0
+
+    def with_structured_output(self, schema):
+        def respond(prompt_value):
+            # Articles are rendered into the prompt as dicts, so titles appear as repr()
+            text = prompt_value.to_string()
+            cards = next(c for title, c in self.fixture.items() if repr(title) in text)
+            if schema is FlashcardOutput:
+                output = schema(flashcards=cards)
+            else:
+                output = schema(flashcards=[
+                    FlashcardDraft(question=c["question"], answer=c["answer"], context=c["context"],
+                                   company=c["the_company_mainly_concerned_with_the_news_article"])
+                    for c in cards
+                ])
+            tokens = output_tokens(output)
+            self.tokens += tokens
+            time.sleep(tokens / self.tokens_per_second)
+            return output
+
+        return RunnableLambda(respond)
+
+def load_fixture(path):
+    """(articles, {title: cards}) from a flashcards.json file."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    articles, fixture = [], {}
+    for entry in data:
+        cards = entry["flashcards"]
+        first = cards[0]
+        article = {"title": first["title"], "summary": first["summary"],
+                   "published_at": first["published_at"], "source": first["source"],
+                   "link": first["link"]}
+        articles.append(article)
+        fixture[article["title"]] = cards
+    return articles, fixture
+
+def run(label, llm, generate, articles):
+    start = time.perf_counter()
+    results = generate(articles)
+    elapsed = time.perf_counter() - start
+    print(f"{label:>5} {llm.tokens:>14} {elapsed:>7.2f}s")
+    return results, llm.tokens, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixture", default=os.path.join(ROOT_DIR, "flashcards.json"))
+    parser.add_argument("--tokens-per-second", type=float, default=400)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    articles, fixture = load_fixture(args.fixture)
+    cards = sum(len(c) for c in fixture.values())
+    print(f"{len(articles)} articles, {cards} flashcards from {args.fixture}\n")
+    print(f"{'run':>5} {'output tokens':>14} {'time':>8}")
+
+    full_llm = ReplayChatModel(fixture, args.tokens_per_second)
+    full_chain = (ChatPromptTemplate.from_template(FLASHCARD_PROMPT)
+                  | full_llm.with_structured_output(FlashcardOutput))
+    _, full_tokens, full_time = run("full", full_llm, lambda a: full_chain.batch(
+        [{"article": x} for x in a], config={"max_concurrency": args.concurrency}), articles)
+
+    slim_llm = ReplayChatModel(fixture, args.tokens_per_second)
+    generator = FlashcardGenerator(llm=slim_llm, concurrency=args.concurrency, batch_tokens=0)
+    results, slim_tokens, slim_time = run("slim", slim_llm, generator.generate_many, articles)
+
+    print(f"\nOutput tokens saved: {1 - slim_tokens / full_tokens:.0%}, "
+          f"time saved: {1 - slim_time / full_time:.0%}")
+
+    same_fields = all(
+        not isinstance(r, Exception)
+        and all(set(c) == set(f) for c, f in zip(r.model_dump()["flashcards"], fixture[a["title"]]))
+        for a, r in zip(articles, results)
+    )
+    drifted = sum(
+        any(c[k] != a[k] for k in METADATA)
+        for a in articles for c in fixture[a["title"]]
+    )
+    print(f"Backfilled output matches the fixture's fields: {same_fields}")
+    print(f"Fixture cards whose copied metadata drifted from their article: {drifted}/{cards}")
+    sys.exit(0 if same_fields else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Time flashcard generation at different concurrency caps against a fake
+chat model that simulates LLM latency, without Ollama running.
+
+    python -m flashcard_pipeline.bench.concurrency [--articles 24]
+        [--latency 0.5] [--concurrency 1 4 8] [--fail-every 7]
+        [--batch-tokens 0 400]
+
+Checks that results come back in input order and that failing articles
+(every --fail-every'th) only lose their own flashcards. With
+--batch-tokens, articles are also packed several per request.
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from langchain_core.runnables import RunnableLambda
+from ..flashcard_generator import FlashcardGenerator
+from ..schema import FlashcardDraft, ArticleDrafts, BatchDraftOutput
+
+TITLE_RE = re.compile(r"'title': '([^']*)'")
+
+class FakeChatModel:
+    """
+    Stands in for ChatOllama: `with_structured_output(schema)` returns a
+    runnable that sleeps ~`latency` seconds (plus `per_article` for each
+    extra article in a packed request) and asks one question per article
+    about its title. Titles containing "FAIL" raise, or are left out of a
+    packed response.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.2, seed=0, per_article=0.05):
+        self.latency = latency
+        self.jitter = jitter
+        self.per_article = per_article
+        self.calls = 0
+        self._rng = random.Random(seed)
+
+    def with_structured_output(self, schema):
+        def card(title):
+            return FlashcardDraft(question=f"What happened: {title}?", answer=title,
+                                  context="", company="")
+
+        def respond(prompt_value):
+            titles = TITLE_RE.findall(prompt_value.to_string())
+            self.calls += 1
+            time.sleep(self.latency * (1 + self._rng.uniform(-self.jitter, self.jitter))
+                       + self.per_article * (len(titles) - 1))
+            if schema is BatchDraftOutput:
+                return schema(articles=[
+                    ArticleDrafts(article_index=i, flashcards=[card(title)])
+                    for i, title in enumerate(titles) if "FAIL" not in title
+                ])
+            if "FAIL" in titles[0]:
+                raise RuntimeError(f"simulated LLM failure for {titles[0]}")
+            return schema(flashcards=[card(titles[0])])
+
+        return RunnableLambda(respond)
+
+def make_articles(n, fail_every):
+    return [
+        {"title": f"Article {i}" + (" FAIL" if fail_every and i % fail_every == 0 else ""),
+         "summary": "...", "published_at": "", "source": "BENCH",
+         "link": f"https://example.com/{i}"}
+        for i in range(n)
+    ]
+
+def check(articles, results):
+    ok = True
+    for article, result in zip(articles, results):
+        failed = "FAIL" in article["title"]
+        if failed != isinstance(result, Exception):
+            ok = False
+        elif not failed and (result.flashcards[0].answer != article["title"]
+                             or result.flashcards[0].link != article["link"]):
+            ok = False
+    return ok and len(results) == len(articles)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--articles", type=int, default=24)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--fail-every", type=int, default=7)
+    parser.add_argument("--batch-tokens", type=int, nargs="+", default=[0])
+    args = parser.parse_args()
+
+    articles = make_articles(args.articles, args.fail_every)
+    failures = 0
+    baseline = None
+
+    print(f"{'batch tokens':>12} {'concurrency':>11} {'calls':>6} {'time':>8} {'speedup':>8} "
+          f"{'errors':>7}  order ok")
+    for tokens in args.batch_tokens:
+        llm = FakeChatModel(args.latency)
+        generator = FlashcardGenerator(llm=llm, batch_tokens=tokens)
+        for c in args.concurrency:
+            calls = llm.calls
+            start = time.perf_counter()
+            results = generator.generate_many(articles, concurrency=c)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            ok = check(articles, results)
+            failures += not ok
+            errors = sum(isinstance(r, Exception) for r in results)
+            print(f"{tokens:>12} {c:>11} {llm.calls - calls:>6} {elapsed:>7.2f}s "
+                  f"{baseline / elapsed:>7.1f}x {errors:>7}  {ok}")
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
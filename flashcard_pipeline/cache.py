@@ -0,0 +1,102 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# SQLite's default host-parameter limit is 999 on older builds
+CHUNK_SIZE = 500
+
+def _chunks(seq, size=CHUNK_SIZE):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+def cache_key(payload, prompt_version, model):
+    """
+    Content address of one generation: the exact payload sent to the LLM,
+    plus the prompt version and model that turn it into flashcards.
+    """
+    content = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(
+        "\0".join([content, str(prompt_version), model]).encode("utf-8")
+    ).hexdigest()
+
+class FlashcardCache:
+    """
+    Persistent LLM outputs keyed by cache_key, stored as JSON. Entries
+    older than `ttl` seconds are ignored and purged; beyond `max_items`
+    the least recently used are evicted.
+    """
+
+    def __init__(self, path, ttl, max_items):
+        self.path = path
+        self.ttl = ttl
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS flashcards (
+                key TEXT PRIMARY KEY,
+                output TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS flashcards_last_access ON flashcards (last_access)"
+        )
+
+    def get_many(self, keys):
+        """{key: output dict} for the keys cached and not expired."""
+        now = time.time()
+        found = {}
+        with self._lock:
+            for chunk in _chunks(list(dict.fromkeys(keys))):
+                marks = ",".join("?" * len(chunk))
+                cur = self._conn.execute(
+                    f"SELECT key, output FROM flashcards "
+                    f"WHERE key IN ({marks}) AND created_at >= ?",
+                    chunk + [now - self.ttl]
+                )
+                found.update((k, json.loads(v)) for k, v in cur.fetchall())
+            if found:
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE flashcards SET last_access = ? WHERE key = ?",
+                        [(now, k) for k in found]
+                    )
+            self.hits += sum(k in found for k in keys)
+            self.misses += sum(k not in found for k in keys)
+        return found
+
+    def put_many(self, items):
+        """Store (key, output dict) pairs, then evict past TTL / size."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO flashcards VALUES (?, ?, ?, ?)",
+                [(k, json.dumps(v, ensure_ascii=False), now, now) for k, v in items]
+            )
+            self._conn.execute("DELETE FROM flashcards WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM flashcards WHERE key IN ("
+                " SELECT key FROM flashcards ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_items,)
+            )
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM flashcards").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hit_rate(), "size": size}
+
+    def reset_stats(self):
+        self.hits = self.misses = 0
@@ -0,0 +1,31 @@
+import os
+
+# Local LLM served by Ollama
+LLM_MODEL = os.getenv("FLASHCARD_LLM_MODEL", "mistral")
+LLM_TEMPERATURE = 0
+
+# Articles sent to the LLM at once. Ollama queues requests beyond its
+# OLLAMA_NUM_PARALLEL, so raising this past that only adds waiting.
+FLASHCARD_CONCURRENCY = int(os.getenv("FLASHCARD_CONCURRENCY", "4"))
+
+# Pack several short articles into one LLM request, up to this many
+# (estimated) article tokens per request. 0 sends one article per request.
+FLASHCARD_BATCH_TOKENS = int(os.getenv("FLASHCARD_BATCH_TOKENS", "0"))
+FLASHCARD_BATCH_MAX_ARTICLES = 8
+# When streaming with packing on, wait this long for more articles to
+# fill a pack before sending what has arrived
+FLASHCARD_STREAM_LINGER_SECONDS = 0.5
+
+# Related-article context: the k nearest earlier articles from the vector
+# store (VECTORDB_DIR) are given to the LLM as background, within a budget
+# of estimated tokens per article. 0 turns retrieval off.
+FLASHCARD_RELATED_K = int(os.getenv("FLASHCARD_RELATED_K", "3"))
+FLASHCARD_RELATED_TOKENS = 300
+FLASHCARD_RELATED_CACHE_SIZE = 1_000  # stories whose lookups are kept
+FLASHCARD_RELATED_TTL_SECONDS = 6 * 3600  # a story's lookup is redone after this
+VECTORDB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "vectordb")
+
+# Generated flashcards, keyed by article payload + PROMPT_VERSION + model
+FLASHCARD_CACHE_DB = os.path.join(os.path.dirname(os.path.dirname(__file__)), "flashcard_cache.sqlite")
+FLASHCARD_CACHE_TTL_SECONDS = 7 * 24 * 3600
+FLASHCARD_CACHE_MAX_ITEMS = 20_000
@@ -0,0 +1,112 @@
+"""
+Related-article context for flashcard generation: earlier coverage of the
+same story, looked up in the ArticleRetriever vector store and handed to
+the LLM as a short background block.
+"""
+import threading
+import time
+from collections import OrderedDict
+from .batching import estimate_tokens
+from .embeddings import article_text, article_id
+
+# Characters of a related article's summary kept in the block
+SUMMARY_CHARS = 200
+
+def story_key(article):
+    """
+    Articles of one story share a lookup: the news pipeline tags every
+    article of a dedupe cluster with the same event_id. Ids are only unique
+    within one event index, so the index is part of the key.
+    """
+    if article.get("event_id") is not None:
+        return f"event:{article.get('event_index', '')}:{article['event_id']}"
+    return f"text:{article_id(article_text(article))}"
+
+def format_related(docs, article, token_budget):
+    """
+    Bullet list of `docs` (Chroma Documents) other than `article` itself,
+    cut off once it would exceed `token_budget` estimated tokens.
+    """
+    own_text, own_link = article_text(article), article.get("link")
+    lines, used = [], 0
+    for doc in docs:
+        meta = doc.metadata or {}
+        if doc.page_content == own_text or (own_link and meta.get("link") == own_link):
+            continue
+        title = meta.get("title") or doc.page_content.split("\n", 1)[0]
+        body = doc.page_content.split("\n", 1)[-1][:SUMMARY_CHARS]
+        line = f"- {meta.get('source', '')} {str(meta.get('published_at', ''))[:10]}: {title}. {body}"
+        tokens = estimate_tokens(line)
+        if used + tokens > token_budget:
+            break
+        lines.append(line)
+        used += tokens
+    return "\n".join(lines)
+
+class RelatedContext:
+    """
+    Looks up the `k` nearest stored articles for each story, once per
+    story (LRU of `cache_size` stories) and at most every `ttl` seconds,
+    so a story that runs on picks up coverage added since. The new
+    articles are then stored so later ones can find them. Thread-safe.
+    Time spent here, including embedding and ingestion, is counted in
+    `stats()` apart from the LLM.
+    """
+
+    def __init__(self, retriever, k, token_budget, cache_size, ttl):
+        self.retriever = retriever
+        self.k = k
+        self.token_budget = token_budget
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self._related = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"articles": 0, "lookups": 0, "cached": 0, "seconds": 0.0}
+
+    def blocks(self, articles):
+        """A related-coverage block per article ("" when there is none)."""
+        start = time.perf_counter()
+        now = time.time()
+        keys = [story_key(a) for a in articles]
+        known = {}
+        with self._lock:
+            for k in keys:
+                entry = self._related.get(k)
+                if entry is None:
+                    continue
+                docs, looked_up = entry
+                if now - looked_up >= self.ttl:
+                    del self._related[k]
+                    continue
+                known[k] = docs
+                self._related.move_to_end(k)
+
+        todo = {}
+        for a, k in zip(articles, keys):
+            if k not in known:
+                todo.setdefault(k, a)
+        if todo:
+            # One batched embed for every story's query; one extra result in
+            # case the article itself is already stored
+            found = self.retriever.search_many(
+                [article_text(a) for a in todo.values()], k=self.k + 1)
+            known.update(zip(todo, found))
+            with self._lock:
+                for k in todo:
+                    self._related[k] = (known[k], now)
+                while len(self._related) > self.cache_size:
+                    self._related.popitem(last=False)
+
+        self.retriever.add_articles(articles)
+        blocks = [format_related(known[k], a, self.token_budget) for a, k in zip(articles, keys)]
+
+        with self._lock:
+            self._stats["articles"] += len(articles)
+            self._stats["lookups"] += len(todo)
+            self._stats["cached"] += len(articles) - len(todo)
+            self._stats["seconds"] += time.perf_counter() - start
+        return blocks
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
@@ -1,19 +1,109 @@
+import hashlib
+from langchain_core.embeddings import Embeddings
 from langchain_community.embeddings import SentenceTransformerEmbeddings
 from langchain_chroma import Chroma
+from news_pipeline.embeddings.client import get_client, mark_down, EmbeddingServerError
+
+RETRIEVER_MODEL = "all-MiniLM-L6-v2"
+# Texts per Chroma get/add call; well under Chroma's max batch size
+RETRIEVER_CHUNK_SIZE = 256
+
+class SharedEmbeddings(Embeddings):
+    """
+    Embeds through the shared embedding server (news_pipeline's
+    `python -m embeddings.server`) when it is running, so the retriever does
+    not load its own copy of the model. Falls back to a local
+    SentenceTransformer, loaded on first use.
+    """
+
+    def __init__(self, model_name=RETRIEVER_MODEL, socket_path=None):
+        self.model_name = model_name
+        self.socket_path = socket_path
+        self._local = None
+
+    def _encode(self, texts):
+        client = get_client(self.socket_path)
+        if client is not None:
+            try:
+                return client.encode(texts, self.model_name).tolist()
+            except EmbeddingServerError as e:
+                print(f"Embedding server unavailable, encoding locally: {e}")
+                mark_down(client.path)
+        if self._local is None:
+            self._local = SentenceTransformerEmbeddings(model_name=self.model_name)
+        return self._local.embed_documents(texts)
+
+    def embed_documents(self, texts):
+        return self._encode(list(texts))
+
+    def embed_query(self, text):
+        return self._encode([text])[0]
+
+def article_text(article):
+    """
+    The text stored for an article: its "content" when given, else the
+    same title + summary text the news pipeline embeds.
+    """
+    if article.get("content"):
+        return article["content"]
+    return article.get("title", "") + "\n" + article.get("summary", "")
+
+def article_id(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def article_metadata(article):
+    # Chroma only stores scalar metadata values
+    return {
+        k: article[k] for k in ("title", "link", "source", "published_at")
+        if isinstance(article.get(k), (str, int, float, bool))
+    }
 
 class ArticleRetriever:
 
-    def __init__(self, persist_directory="vectordb"):
-        self.embeddings = SentenceTransformerEmbeddings(model_name="all-MiniLM-L6-v2")
+    def __init__(self, persist_directory="vectordb", embeddings=None):
+        self.embeddings = embeddings or SharedEmbeddings()
+        model_name = getattr(self.embeddings, "model_name", RETRIEVER_MODEL)
         self.db = Chroma(
-            collection_name="news",
+            # One collection per embedding model; their vectors do not mix
+            collection_name="news" if model_name == RETRIEVER_MODEL else f"news-{model_name}",
             embedding_function=self.embeddings,
             persist_directory=persist_directory
         )
 
     def add_articles(self, articles):
-        texts = [article["content"] for article in articles]
-        self.db.add_texts(texts)
+        """
+        Store articles under content-hash ids, skipping any already stored
+        (or repeated in `articles`), so re-adding the same articles neither
+        duplicates nor re-embeds them. Returns the number added.
+        """
+        pending = {}
+        for article in articles:
+            text = article_text(article)
+            pending.setdefault(article_id(text), (text, article_metadata(article)))
+
+        ids = list(pending)
+        added = 0
+        for start in range(0, len(ids), RETRIEVER_CHUNK_SIZE):
+            chunk = ids[start:start + RETRIEVER_CHUNK_SIZE]
+            present = set(self.db.get(ids=chunk, include=[])["ids"])
+            new = [i for i in chunk if i not in present]
+            if not new:
+                continue
+            self.db.add_texts(
+                [pending[i][0] for i in new],
+                metadatas=[pending[i][1] for i in new],
+                ids=new
+            )
+            added += len(new)
+        return added
 
     def search(self, query, k=2):
         return self.db.similarity_search(query, k=k)
+
+    def search_many(self, queries, k=2):
+        """search() for many queries, embedding them all in one batch."""
+        queries = list(queries)
+        if not queries:
+            return []
+        vectors = self.embeddings.embed_documents(queries)
+        return [self.db.similarity_search_by_vector(vec, k=k) for vec in vectors]
@@ -1,33 +1,210 @@
 import json
-from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
-from .prompts import FLASHCARD_PROMPT
-from .schema import FlashcardOutput
+from langchain_core.runnables import RunnableLambda
+from .batching import pack_articles, format_pack, split_output, estimate_tokens
+from .cache import cache_key
+from .config import (
+    LLM_MODEL, LLM_TEMPERATURE, FLASHCARD_CONCURRENCY,
+    FLASHCARD_BATCH_TOKENS, FLASHCARD_BATCH_MAX_ARTICLES
+)
+from .prompts import FLASHCARD_PROMPT, BATCH_FLASHCARD_PROMPT, PROMPT_VERSION
+from .schema import FlashcardOutput, FlashcardDraftOutput, BatchDraftOutput, backfill
+
+try:
+    # Same module, and so the same registry, as the news pipeline's when
+    # news_pipeline/ is on sys.path (app.py, pipeline.py)
+    from utils import metrics
+except ImportError:
+    from news_pipeline.utils import metrics
+
+def prompt_article(article):
+    """
+    What the LLM sees of an article payload. The link is only needed for
+    backfill, and is long, so it is left out of the prompt.
+    """
+    return {k: v for k, v in article.items() if k != "link"}
+
+def timed_llm(runnable, mode):
+    """
+    `runnable` with each LLM call timed as an "llm_call" span and its
+    estimated prompt/output tokens counted. Returned as is when metrics
+    are off.
+    """
+    if not metrics.enabled():
+        return runnable
+
+    def call(prompt_value, config=None):
+        with metrics.span("llm_call", mode=mode):
+            output = runnable.invoke(prompt_value, config)
+        metrics.count("llm_tokens", estimate_tokens(prompt_value.to_string()),
+                      kind="prompt", mode=mode)
+        if output is not None:
+            metrics.count("llm_tokens", estimate_tokens(output.model_dump_json()),
+                          kind="output", mode=mode)
+        return output
+
+    return RunnableLambda(call)
+
+def complete(draft, article):
+    """
+    The FlashcardOutput for one article's LLM result, or the exception
+    standing in for it. Structured output comes back as None when the
+    model made no tool call; that, like any malformed draft, only fails
+    this article.
+    """
+    if isinstance(draft, Exception):
+        return draft
+    if draft is None:
+        return ValueError("LLM returned no structured output")
+    try:
+        return backfill(draft.flashcards, article)
+    except Exception as e:
+        return e
 
 class FlashcardGenerator:
 
-    def __init__(self):
-        self.llm = ChatOllama(
-            model="mistral",
-            temperature=0
-        )
+    def __init__(self, llm=None, concurrency=FLASHCARD_CONCURRENCY, cache=None,
+                 batch_tokens=FLASHCARD_BATCH_TOKENS):
+        if llm is None:
+            from langchain_ollama import ChatOllama
+            llm = ChatOllama(model=LLM_MODEL, temperature=LLM_TEMPERATURE)
+        self.llm = llm
+        self.model_name = getattr(llm, "model", None) or type(llm).__name__
+        self.concurrency = concurrency
+        self.cache = cache
         self.prompt = ChatPromptTemplate.from_template(FLASHCARD_PROMPT)
+        # Built once; the runnable is stateless and safe to share across threads.
+        # The LLM only writes question/answer/context/company; backfill()
+        # copies the rest from the article.
+        self.chain = self.prompt | timed_llm(
+            self.llm.with_structured_output(FlashcardDraftOutput), "single")
+        self.batch_tokens = batch_tokens
+        if batch_tokens:
+            self.batch_chain = (ChatPromptTemplate.from_template(BATCH_FLASHCARD_PROMPT)
+                                | timed_llm(self.llm.with_structured_output(BatchDraftOutput),
+                                            "packed"))
 
     def load_news(self, file_path="news_output.json"):
         with open(file_path, "r") as f:
             return json.load(f)
 
     def generate_for_article(self, article):
-        chain = self.prompt | self.llm.with_structured_output(FlashcardOutput)
-        return chain.invoke({"article": article})
+        drafts = self.chain.invoke({"article": prompt_article(article)})
+        return backfill(drafts.flashcards, article)
+
+    def generate_many(self, articles, concurrency=None, related=None):
+        """
+        Generate for all articles with at most `concurrency` LLM calls in
+        flight. Results are in input order; an article that failed gets its
+        exception in place of a result, without affecting the others.
+
+        With a cache, only articles whose payload (or the prompt version or
+        model) changed since they were last generated reach the LLM.
+
+        `related(positions)`, if given, returns a related-coverage block
+        per position in `articles`. It is only asked for the articles that
+        reach the LLM, and a non-empty block goes into their prompt.
+        """
+        if not articles:
+            return []
+        if self.cache is None:
+            return self._batch(self._with_related(articles, range(len(articles)), related),
+                               concurrency)
+
+        keys = [cache_key(a, PROMPT_VERSION, self.model_name) for a in articles]
+        with metrics.span("flashcard_cache_lookup"):
+            cached = self.cache.get_many(keys)
+        hits = sum(k in cached for k in keys)
+        metrics.count("cache_hits", hits, cache="flashcard")
+        metrics.count("cache_misses", len(keys) - hits, cache="flashcard")
+        results = [
+            FlashcardOutput.model_validate(cached[k]) if k in cached else None
+            for k in keys
+        ]
+
+        # Identical payloads within one run are generated once
+        todo = {}
+        for i, k in enumerate(keys):
+            if k not in cached:
+                todo.setdefault(k, i)
+        prompts = self._with_related(articles, list(todo.values()), related)
+        fresh = dict(zip(todo, self._batch(prompts, concurrency)))
+        for i, k in enumerate(keys):
+            if k in fresh:
+                results[i] = fresh[k]
+        self.cache.put_many([
+            (k, result.model_dump()) for k, result in fresh.items()
+            if not isinstance(result, Exception)
+        ])
+        return results
+
+    def _with_related(self, articles, positions, related):
+        chosen = [articles[i] for i in positions]
+        if related is None or not chosen:
+            return chosen
+        # Background only; cards are cached by the article itself
+        blocks = related(list(positions))
+        return [dict(a, related=block) if block else a for a, block in zip(chosen, blocks)]
+
+    def _batch(self, articles, concurrency=None):
+        if not articles:
+            return []
+        if self.batch_tokens and len(articles) > 1:
+            return self._packed(articles, concurrency)
+        return self._single(articles, concurrency)
+
+    def _single(self, articles, concurrency=None):
+        drafts = self.chain.batch(
+            [{"article": prompt_article(a)} for a in articles],
+            config={"max_concurrency": concurrency or self.concurrency},
+            return_exceptions=True
+        )
+        return [complete(d, a) for a, d in zip(articles, drafts)]
+
+    def _packed(self, articles, concurrency=None):
+        """
+        _batch with several articles per request, packed up to
+        `batch_tokens`. Articles whose flashcards did not come back (or
+        came back under a repeated or out-of-range index) are retried one
+        per request, so a bad pack only costs its own failures.
+        """
+        packs = pack_articles(articles, self.batch_tokens, FLASHCARD_BATCH_MAX_ARTICLES)
+        outputs = self.batch_chain.batch(
+            [{"articles": format_pack([prompt_article(articles[i]) for i in pack])}
+             for pack in packs],
+            config={"max_concurrency": concurrency or self.concurrency},
+            return_exceptions=True
+        )
+
+        results = [None] * len(articles)
+        retry = []
+        for pack, output in zip(packs, outputs):
+            # A failed, empty (None) or malformed pack is retried article by article
+            try:
+                split = split_output(output, len(pack))
+            except Exception:
+                split = {}
+            for position, i in enumerate(pack):
+                try:
+                    results[i] = backfill(split[position], articles[i])
+                except Exception:
+                    retry.append(i)
+
+        if retry:
+            retried = self._single([articles[i] for i in retry], concurrency)
+            for i, result in zip(retry, retried):
+                results[i] = result
+        return results
 
     def run(self, output_file="flashcards.json"):
         news_data = self.load_news()
         flashcards = []
 
-        for article in news_data["articles"]:
-            result = self.generate_for_article(article)
-            flashcards.append(result)
+        for result in self.generate_many(news_data["articles"]):
+            if isinstance(result, Exception):
+                print("Error generating flashcards:", result)
+                continue
+            flashcards.append(result.dict())
 
         with open(output_file, "w") as f:
             json.dump(flashcards, f, indent=4)
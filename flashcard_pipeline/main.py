@@ -2,8 +2,21 @@
 
 import os
 import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from flashcard_pipeline.flashcard_generator import FlashcardGenerator
+from flashcard_pipeline.flashcard_generator import FlashcardGenerator, metrics
+from flashcard_pipeline.schema import FlashcardOutput
+from flashcard_pipeline.batching import estimate_tokens
+from flashcard_pipeline.cache import FlashcardCache
+from flashcard_pipeline.config import (
+    FLASHCARD_CACHE_DB, FLASHCARD_CACHE_TTL_SECONDS, FLASHCARD_CACHE_MAX_ITEMS,
+    FLASHCARD_BATCH_MAX_ARTICLES, FLASHCARD_STREAM_LINGER_SECONDS,
+    FLASHCARD_RELATED_K, FLASHCARD_RELATED_TOKENS, FLASHCARD_RELATED_CACHE_SIZE,
+    FLASHCARD_RELATED_TTL_SECONDS, VECTORDB_DIR
+)
 
 load_dotenv()  # loads .env from ROOT
 
@@ -28,45 +41,266 @@ def load_news_json():
     return data
 
 
-def save_flashcards(data):
-    """Write generated flashcards to flashcards.json."""
-    with open(FLASHCARDS_JSON_PATH, "w", encoding="utf-8") as f:
+def save_flashcards(data, path=FLASHCARDS_JSON_PATH):
+    """Write generated flashcards to `path` (flashcards.json by default)."""
+    # Write-then-rename, so readers never see a half-written file
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
+    os.replace(tmp, path)
 
-    print(f"\nFlashcards saved: {FLASHCARDS_JSON_PATH}")
+    print(f"\nFlashcards saved: {path}")
 
 
-def main():
-    print("Flashcard pipeline started...\n")
+_generator = None
+_generator_lock = threading.Lock()
 
-    print("Loading resultsgen.json ...")
-    articles = load_news_json()
-    print(f"Found {len(articles)} articles.\n")
+def get_generator():
+    """Process-wide generator, so the chain and cache connection are reused."""
+    global _generator
+    with _generator_lock:
+        if _generator is None:
+            cache = FlashcardCache(FLASHCARD_CACHE_DB, FLASHCARD_CACHE_TTL_SECONDS,
+                                   FLASHCARD_CACHE_MAX_ITEMS)
+            _generator = FlashcardGenerator(cache=cache)
+        return _generator
 
-    generator = FlashcardGenerator()
-    flashcard_results = []
 
-    for idx, article in enumerate(articles, start=1):
+_context = None
+_context_loaded = False
+_context_lock = threading.Lock()
+
+def get_context():
+    """
+    Process-wide RelatedContext over the VECTORDB_DIR store, or None when
+    FLASHCARD_RELATED_K is 0 or the vector store is not installed.
+    """
+    global _context, _context_loaded
+    with _context_lock:
+        if not _context_loaded:
+            _context_loaded = True
+            if FLASHCARD_RELATED_K:
+                try:
+                    from flashcard_pipeline.context import RelatedContext
+                    from flashcard_pipeline.embeddings import ArticleRetriever
+                    _context = RelatedContext(ArticleRetriever(VECTORDB_DIR), FLASHCARD_RELATED_K,
+                                              FLASHCARD_RELATED_TOKENS, FLASHCARD_RELATED_CACHE_SIZE,
+                                              FLASHCARD_RELATED_TTL_SECONDS)
+                except ImportError as e:
+                    print(f"Related-article context disabled: {e}")
+        return _context
+
+
+def article_payload(article):
+    """The fields of a news article the flashcard prompt is given."""
+    # The model needs content — combine title + summary for best results
+    return {
+        "title": article.get("title", ""),
+        "summary": article.get("summary", ""),
+        "published_at": article.get("published_at", ""),
+        "source": article.get("source", ""),
+        "link": article.get("link", ""),
+    }
+
+
+def related_lookup(articles, context=None):
+    """
+    The `related` callback for generate_many: blocks of earlier coverage
+    for the news articles at the given positions, from `context`. A failed
+    lookup only costs the context, not the flashcards.
+    """
+    if context is None:
+        return None
+
+    def lookup(positions):
+        try:
+            with metrics.span("related_context"):
+                return context.blocks([articles[i] for i in positions])
+        except Exception as e:
+            print(f"Related-article lookup failed: {e}")
+            return [""] * len(positions)
+
+    return lookup
+
+
+def report_cache(cache, hits, misses):
+    """Print the cache hit rate since the counts were `hits` and `misses`."""
+    if cache is None:
+        return
+    # Deltas, since the generator and its cache outlive one run
+    hits, misses = cache.hits - hits, cache.misses - misses
+    rate = hits / (hits + misses) if hits + misses else 0.0
+    print(f"\nFlashcard cache: {hits}/{hits + misses} hits ({rate:.0%}), "
+          f"{cache.stats()['size']} entries stored")
+
+
+def generate_flashcards(articles, generator=None, output_path=None, context=None):
+    """
+    Generate flashcards for news articles held in memory (e.g. straight
+    from get_all_news) and return them as a list of dicts, one per article
+    that succeeded, in article order. `output_path` optionally also writes
+    them to disk. `context` defaults to get_context().
+    """
+    articles = list(articles)
+    generator = generator or get_generator()
+    context = context or get_context()
+
+    cache = generator.cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+
+    print(f"Generating flashcards for {len(articles)} articles "
+          f"({generator.concurrency} at a time)...")
+    related = context.stats() if context is not None else None
+    start = time.perf_counter()
+    results = generator.generate_many([article_payload(a) for a in articles],
+                                      related=related_lookup(articles, context))
+    elapsed = time.perf_counter() - start
+
+    flashcard_results = []
+    for idx, (article, result) in enumerate(zip(articles, results), start=1):
         title = article.get("title", "Untitled Article")
 
-        print(f"Generating flashcards {idx}/{len(articles)} → {title}")
+        if not isinstance(result, FlashcardOutput):
+            print(f"Error generating flashcards for article {idx} ({title}): {result}")
+            continue
+
+        print(f"Generated flashcards {idx}/{len(articles)} → {title}")
+        flashcard_results.append(result.dict())
+
+    if related is not None:
+        # Deltas, since the context outlives one run
+        now = context.stats()
+        # One lookup per story not seen before; its other articles share it
+        lookups = now["lookups"] - related["lookups"]
+        seconds = now["seconds"] - related["seconds"]
+        print(f"\nRelated context: {lookups} lookups for {now['articles'] - related['articles']} "
+              f"uncached articles in {seconds:.2f}s; generation {elapsed - seconds:.2f}s")
+
+    report_cache(cache, hits, misses)
+
+    if output_path:
+        save_flashcards(flashcard_results, output_path)
+    return flashcard_results
+
 
-        # The model needs content — combine title + summary for best results
-        article_payload = {
-            "title": article.get("title", ""),
-            "summary": article.get("summary", ""),
-            "published_at": article.get("published_at", ""),
-            "source": article.get("source", ""),
-        }
+def stream_flashcards(articles, generator=None, context=None):
+    """
+    Generate flashcards for an iterable of articles (e.g. stream_news) as
+    it produces them, yielding (article, flashcards dict) in completion
+    order. Failed articles are reported and skipped. `context` defaults to
+    get_context().
 
+    With packing on (`generator.batch_tokens`), articles that arrive
+    within FLASHCARD_STREAM_LINGER_SECONDS of each other go to the LLM
+    together, up to one pack; otherwise each goes on its own. At most
+    `generator.concurrency` of these batches are in flight, and the source
+    is read at most one batch ahead of them. Cache hits are reported once
+    the stream ends.
+    """
+    generator = generator or get_generator()
+    context = context or get_context()
+    cache = generator.cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+
+    max_articles = FLASHCARD_BATCH_MAX_ARTICLES if generator.batch_tokens else 1
+    slots = threading.BoundedSemaphore(generator.concurrency)
+    incoming = queue.Queue(maxsize=max_articles)
+    done = queue.Queue()
+    stop = threading.Event()
+    end = object()
+    pool = ThreadPoolExecutor(max_workers=generator.concurrency,
+                              thread_name_prefix="flashcards")
+
+    def generate(batch):
         try:
-            result = generator.generate_for_article(article_payload)
-            flashcard_results.append(result.dict())
+            results = generator.generate_many([article_payload(a) for a in batch],
+                                              related=related_lookup(batch, context))
+        except Exception as e:
+            results = [e] * len(batch)
+        finally:
+            slots.release()
+        for article, result in zip(batch, results):
+            done.put((article, result))
 
+    def pull():
+        try:
+            for article in articles:
+                if stop.is_set():
+                    break
+                incoming.put(article)
         except Exception as e:
-            print(f"Error generating flashcards for article {idx}: {e}")
+            done.put((None, e))
+        incoming.put(end)
+
+    def next_batch(first=None):
+        # (batch, what starts the next one): waits for a first article, then
+        # lingers for more that fit in one pack. Empty once the source is done.
+        if first is None:
+            first = incoming.get()
+        if first is end:
+            return [], end
+        batch, tokens = [first], estimate_tokens(article_payload(first))
+        deadline = time.monotonic() + FLASHCARD_STREAM_LINGER_SECONDS
+        while len(batch) < max_articles:
+            try:
+                article = incoming.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if article is end:
+                return batch, end
+            tokens += estimate_tokens(article_payload(article))
+            if tokens > generator.batch_tokens:
+                return batch, article
+            batch.append(article)
+        return batch, None
+
+    def feed():
+        submitted, held = 0, None
+        while held is not end:
+            slots.acquire()
+            if stop.is_set():
+                slots.release()
+                break
+            batch, held = next_batch(held)
+            if not batch:
+                slots.release()
+                break
+            pool.submit(generate, batch)
+            submitted += len(batch)
+        done.put(submitted)
+
+    threading.Thread(target=pull, name="flashcards-pull", daemon=True).start()
+    threading.Thread(target=feed, name="flashcards-feed", daemon=True).start()
+
+    received, total = 0, None
+    try:
+        while total is None or received < total:
+            item = done.get()
+            if isinstance(item, int):
+                total = item
+                continue
+            article, result = item
+            if article is None:
+                raise result
+            received += 1
+            if not isinstance(result, FlashcardOutput):
+                print(f"Error generating flashcards for {article.get('title', 'article')}: {result}")
+                continue
+            yield article, result.dict()
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        report_cache(cache, hits, misses)
+
+
+def main():
+    print("Flashcard pipeline started...\n")
+
+    print("Loading resultsgen.json ...")
+    articles = load_news_json()
+    print(f"Found {len(articles)} articles.\n")
 
-    save_flashcards(flashcard_results)
+    generate_flashcards(articles, output_path=FLASHCARDS_JSON_PATH)
 
     print("\nFlashcard pipeline finished successfully!")
 
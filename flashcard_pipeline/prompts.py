@@ -1,20 +1,40 @@
+# Bump whenever FLASHCARD_PROMPT, BATCH_FLASHCARD_PROMPT or the output
+# schema changes, so cached flashcards generated by the old prompt are not
+# served again.
+PROMPT_VERSION = 3
+
 FLASHCARD_PROMPT = """
 You are an AI flashcard generator.
 
 Convert this news article into educational flashcards.
-Include:
-    title
+Each flashcard includes:
     question
     answer
     context
-    the_company_mainly_concerned_with_the_news_article
-    link
-    source
-    summary
-    published_at
+    company (the company mainly concerned with the news article)
 
 Use only information from the article. No hallucinations.
+If the article has a "related" field, it lists earlier coverage of the same
+story: use it only as background, and ask about this article.
 
 ARTICLE:
 {article}
 """
+
+BATCH_FLASHCARD_PROMPT = """
+You are an AI flashcard generator.
+
+Convert each of the news articles below into educational flashcards.
+For every article, return its number as article_index together with its flashcards.
+Each flashcard includes:
+    question
+    answer
+    context
+    company (the company mainly concerned with the news article)
+
+Use only information from that article. No hallucinations.
+If an article has a "related" field, it lists earlier coverage of the same
+story: use it only as background, and ask about that article.
+
+{articles}
+"""
@@ -18,3 +18,46 @@ class FlashcardOutput(BaseModel):
     model_config = ConfigDict(extra='forbid')
 
     flashcards: List[Flashcard]
+
+# What the LLM is asked for: only the fields it has to write. The rest of
+# a Flashcard is copied from the article by backfill().
+class FlashcardDraft(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    question: str
+    answer: str
+    context: str
+    company: str
+
+class FlashcardDraftOutput(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    flashcards: List[FlashcardDraft]
+
+class ArticleDrafts(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    article_index: int
+    flashcards: List[FlashcardDraft]
+
+class BatchDraftOutput(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    articles: List[ArticleDrafts]
+
+def backfill(drafts, article):
+    """Full FlashcardOutput for `article` from the LLM's drafts of its cards."""
+    return FlashcardOutput(flashcards=[
+        Flashcard(
+            title=article.get("title", ""),
+            question=draft.question,
+            answer=draft.answer,
+            context=draft.context,
+            the_company_mainly_concerned_with_the_news_article=draft.company,
+            link=article.get("link", ""),
+            source=article.get("source", ""),
+            summary=article.get("summary", ""),
+            published_at=article.get("published_at", ""),
+        )
+        for draft in drafts
+    ])
@@ -0,0 +1,58 @@
+"""
+Check LSH dedupe against exact DBSCAN and show the recall/speed trade-off.
+
+    cd news_pipeline
+    python -m bench.ann_dedupe [--sizes 1000 10000 30000] [--recalls 0.8 0.9 0.95 0.99]
+
+LSH edges are always verified, so its clusters can only split exact ones.
+"pair recall" is the share of same-cluster pairs under exact DBSCAN that
+LSH also puts together; "split" counts extra clusters.
+"""
+import argparse
+import time
+import numpy as np
+from processing.dedupe import radius_graph, lsh_radius_graph, lsh_params, labels_from_graph
+from utils.similarity import normalize_rows
+from .dedupe import corpus
+
+def same_cluster_pairs(labels):
+    _, counts = np.unique(labels, return_counts=True)
+    return int((counts * (counts - 1) // 2).sum())
+
+def pair_recall(exact, approx):
+    total = same_cluster_pairs(exact)
+    if not total:
+        return 1.0
+    # Pairs together in both = pairs within each (exact, approx) cell
+    joint = exact.astype(np.int64) * (approx.max() + 1) + approx
+    return same_cluster_pairs(joint) / total
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return time.perf_counter() - start, out
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 30000])
+    parser.add_argument("--recalls", type=float, nargs="+", default=[0.8, 0.9, 0.95, 0.99])
+    parser.add_argument("--dim", type=int, default=768)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        Xn = normalize_rows(corpus(n, args.dim))
+        t_exact, exact = timed(lambda: labels_from_graph(radius_graph(Xn)))
+        n_exact = len(np.unique(exact))
+        print(f"\nN={n}: exact {t_exact:.3f}s, {n_exact} clusters")
+        print(f"{'recall':>8} {'bits':>5} {'tables':>7} {'time':>9} {'speedup':>8} "
+              f"{'pair recall':>12} {'split':>6}")
+
+        for recall in args.recalls:
+            bits, tables = lsh_params(n, recall=recall)
+            t_lsh, approx = timed(lambda: labels_from_graph(lsh_radius_graph(Xn, recall=recall)))
+            print(f"{recall:>8.2f} {bits:>5} {tables:>7} {t_lsh:>8.3f}s "
+                  f"{t_exact / t_lsh:>7.1f}x {pair_recall(exact, approx):>12.4f} "
+                  f"{len(np.unique(approx)) - n_exact:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark dedupe clustering: precomputed blocked distances vs the old
+per-pair Python metric.
+
+    cd news_pipeline
+    python -m bench.dedupe [--sizes 100 1000 10000] [--legacy-max 1000]
+
+The legacy path makes O(N^2) interpreter calls, so above --legacy-max its
+time is extrapolated quadratically from the largest measured size.
+"""
+import argparse
+import time
+import numpy as np
+from sklearn.cluster import DBSCAN
+from config import DBSCAN_EPS, DBSCAN_MIN_SAMPLES
+from processing.dedupe import cluster_labels
+from utils.similarity import cosine_similarity
+from .quantization import make_fixture
+
+def legacy_labels(X):
+    def metric(x, y):
+        return 1 - cosine_similarity(x, y)
+
+    return DBSCAN(eps=DBSCAN_EPS, min_samples=DBSCAN_MIN_SAMPLES, metric=metric).fit(X).labels_
+
+def corpus(n, dim, seed=0):
+    # ~2.5 articles per fixture event on average; oversize, then trim
+    articles, _, _ = make_fixture(events=max(2, int(n / 2)), dim=dim, seed=seed)
+    X = np.stack([a["embedding"] for a in articles])
+    while len(X) < n:
+        seed += 1
+        more, _, _ = make_fixture(events=max(2, int(n / 2)), dim=dim, seed=seed)
+        X = np.concatenate([X, np.stack([a["embedding"] for a in more])])
+    return X[:n]
+
+def same_partition(a, b):
+    pairs = {}
+    for x, y in zip(a, b):
+        if pairs.setdefault(x, y) != y:
+            return False
+    return len(set(pairs.values())) == len(pairs)
+
+def timed(fn, X):
+    start = time.perf_counter()
+    labels = fn(X)
+    return time.perf_counter() - start, labels
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--legacy-max", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'N':>7} {'vectorized':>12} {'legacy':>14} {'speedup':>9}  labels")
+    last_legacy = None
+    for n in args.sizes:
+        X = corpus(n, args.dim)
+        t_new, labels = timed(cluster_labels, X)
+
+        if n <= args.legacy_max:
+            t_old, old = timed(legacy_labels, X)
+            last_legacy = (n, t_old)
+            legacy = f"{t_old:12.3f}s"
+            check = "same" if same_partition(labels, old) else "DIFFERENT"
+        elif last_legacy:
+            t_old = last_legacy[1] * (n / last_legacy[0]) ** 2
+            legacy = f"~{t_old:11.1f}s"
+            check = "n/a (extrapolated)"
+        else:
+            t_old, legacy, check = None, f"{'skipped':>13}", "n/a"
+
+        speedup = f"{t_old / t_new:8.0f}x" if t_old else f"{'-':>9}"
+        print(f"{n:>7} {t_new:11.3f}s {legacy:>14} {speedup}  {check}")
+
+if __name__ == "__main__":
+    main()
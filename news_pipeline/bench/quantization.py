@@ -0,0 +1,140 @@
+"""
+Check that quantized embedding storage and scoring leave dedupe and ranking
+unchanged.
+
+    cd news_pipeline
+    python -m bench.quantization [--events 80] [--dim 768] [--tolerance 0.01]
+
+Builds a synthetic fixture corpus of near-duplicate article clusters, round-
+trips its embeddings through each EMBED_CACHE_DTYPE, ranks them with a
+ScoringEngine holding its matrix in the same dtype (EMBED_COMPUTE_DTYPE),
+and compares cluster assignments and rank orderings with the float32
+reference. Differences are
+only accepted when the float32 value they hinge on is within `tolerance`
+(cosine units) of the decision boundary. Exits non-zero on any other change.
+"""
+import argparse
+import sys
+import numpy as np
+from config import DBSCAN_EPS
+from processing.dedupe import cluster_labels
+from processing.ranking import rank_articles
+from processing.scoring import ScoringEngine
+from utils.quantize import DTYPES, quantize
+
+WORDS = ["market", "shares", "bank", "policy", "energy", "hydrogen", "results",
+         "merger", "startup", "funding", "rupee", "exports", "earnings", "tariff"]
+
+def make_fixture(events=80, max_copies=4, dim=768, seed=0):
+    """
+    Articles with embeddings in clusters whose within-cluster cosine spreads
+    from ~0.95 to ~0.7, so some pairs sit right at the DBSCAN_EPS boundary.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(events, dim)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+
+    articles = []
+    for e, center in enumerate(centers):
+        spread = rng.uniform(0.05, 0.45)
+        for c in range(1 + rng.integers(max_copies)):
+            vec = center + rng.normal(scale=np.sqrt(spread / dim), size=dim)
+            words = rng.choice(WORDS, size=4, replace=False)
+            articles.append({
+                "title": f"Event {e}: " + " ".join(words[:2]),
+                "summary": " ".join(words) + f" copy {c}",
+                "link": f"https://example.com/{e}/{c}",
+                "source": "FIXTURE",
+                "embedding": vec.astype(np.float32)
+            })
+    keyword = " ".join(WORDS[:2])
+    kw_vec = (centers[0] + centers[1]).astype(np.float32)
+    return articles, keyword, kw_vec
+
+def _unit(X):
+    return X / np.linalg.norm(X, axis=1, keepdims=True)
+
+def check_dedupe(X_ref, X_q, tolerance):
+    labels_ref = cluster_labels(X_ref)
+    labels_q = cluster_labels(X_q)
+
+    # Which eps-neighbour edges flipped, and were they all borderline?
+    d_ref = 1 - _unit(X_ref) @ _unit(X_ref).T
+    d_q = 1 - _unit(X_q) @ _unit(X_q).T
+    flipped = np.triu((d_ref <= DBSCAN_EPS) != (d_q <= DBSCAN_EPS), 1)
+    outside = flipped & (np.abs(d_ref - DBSCAN_EPS) > tolerance)
+
+    same_ref = labels_ref[:, None] == labels_ref[None, :]
+    same_q = labels_q[:, None] == labels_q[None, :]
+    return {
+        "identical": bool((same_ref == same_q).all()),
+        "edge_flips": int(flipped.sum()),
+        "flips_outside_tolerance": int(outside.sum())
+    }
+
+def check_ranking(articles, articles_q, keyword, kw_vec, tolerance, dtype):
+    ref = rank_articles(articles, keyword, kw_vec, engine=ScoringEngine(articles, dtype="float32"))
+    got = rank_articles(articles_q, keyword, kw_vec, engine=ScoringEngine(articles_q, dtype=dtype))
+    ref_score = {a["link"]: a["score"] for a in ref}
+
+    # Semantic scores are cosine * 100 * weight; tolerance is in cosine units
+    slack = tolerance * 100
+    inversions = sum(
+        1 for a, b in zip(got, got[1:])
+        if ref_score[a["link"]] < ref_score[b["link"]] - slack
+    )
+    return {
+        "identical": [a["link"] for a in ref] == [a["link"] for a in got],
+        "inversions_outside_tolerance": inversions
+    }
+
+def run(events=80, dim=768, tolerance=0.01, seed=0):
+    articles, keyword, kw_vec = make_fixture(events, dim=dim, seed=seed)
+    X = np.stack([a["embedding"] for a in articles])
+    ref_cos = _unit(X) @ (kw_vec / np.linalg.norm(kw_vec))
+
+    report = {}
+    for dtype in DTYPES:
+        qm = quantize(X, dtype)
+        X_q = qm.to_float32()
+        articles_q = [{**a, "embedding": v} for a, v in zip(articles, X_q)]
+        # What ranking sees: stored in `dtype`, scored on a `dtype` matrix
+        cos = ScoringEngine(articles_q, dtype=dtype).semantic_scores(kw_vec) / 100
+        report[dtype] = {
+            "bytes": qm.nbytes,
+            "max_cosine_error": float(np.abs(cos - ref_cos).max()),
+            "dedupe": check_dedupe(X, X_q, tolerance),
+            "ranking": check_ranking(articles, articles_q, keyword, kw_vec, tolerance, dtype)
+        }
+    return len(articles), report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=80)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--tolerance", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    n, report = run(args.events, args.dim, args.tolerance, args.seed)
+    print(f"Fixture: {n} articles, dim {args.dim}, tolerance {args.tolerance}\n")
+
+    failed = False
+    for dtype, r in report.items():
+        d, k = r["dedupe"], r["ranking"]
+        ok = (r["max_cosine_error"] <= args.tolerance
+              and d["flips_outside_tolerance"] == 0
+              and k["inversions_outside_tolerance"] == 0)
+        failed |= not ok
+        print(f"{dtype:>8}: {r['bytes'] / 1024:8.1f} KiB | "
+              f"cos err {r['max_cosine_error']:.5f} | "
+              f"dedupe {'same' if d['identical'] else 'changed'} "
+              f"({d['edge_flips']} edge flips, {d['flips_outside_tolerance']} outside) | "
+              f"ranking {'same' if k['identical'] else 'changed'} "
+              f"({k['inversions_outside_tolerance']} inversions outside) | "
+              f"{'OK' if ok else 'FAIL'}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
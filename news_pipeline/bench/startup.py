@@ -0,0 +1,101 @@
+"""
+Measure import time and memory of the pipeline entry points.
+
+    cd news_pipeline
+    python -m bench.startup [--repeat 3] [--output startup.json]
+                            [--baseline startup.json] [--tolerance 0.25]
+
+Each target is imported in a fresh interpreter, so module caches from one
+measurement never leak into the next. Reports wall time of the import and
+the peak RSS of the child. With --baseline, exits non-zero when a target is
+more than `tolerance` (relative) slower or larger than the recorded run;
+--warmup additionally times loading the embedding model.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+TARGETS = ["config", "processing.ranking", "processing.dedupe", "main"]
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+__import__({target!r})
+elapsed = time.perf_counter() - start
+extra = {{}}
+if {warmup!r}:
+    from embeddings.embedder import warmup
+    t = time.perf_counter()
+    warmup()
+    extra["warmup_s"] = time.perf_counter() - t
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+heavy = [m for m in ("sentence_transformers", "torch", "sklearn", "scipy") if m in sys.modules]
+print(json.dumps(dict(import_s=elapsed, rss_mb=rss_kb / 1024, heavy=heavy, **extra)))
+"""
+
+def measure(target, warmup=False):
+    code = PROBE.format(target=target, warmup=warmup)
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run([sys.executable, "-c", code], cwd=cwd,
+                          capture_output=True, text=True)
+    if proc.returncode:
+        return {"error": proc.stderr.strip().splitlines()[-1]}
+    return json.loads(proc.stdout)
+
+def best_of(target, repeat, warmup=False):
+    # Minimum time over runs; RSS barely varies between them
+    runs = [measure(target, warmup) for _ in range(repeat)]
+    if any("error" in r for r in runs):
+        return next(r for r in runs if "error" in r)
+    return min(runs, key=lambda r: r["import_s"])
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for target, now in results.items():
+        before = baseline.get(target)
+        if not before or "error" in now or "error" in before:
+            continue
+        for key in ("import_s", "rss_mb", "warmup_s"):
+            if key in now and key in before and now[key] > before[key] * (1 + tolerance):
+                found.append(f"{target} {key}: {before[key]:.2f} -> {now[key]:.2f}")
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--targets", nargs="+", default=TARGETS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", action="store_true")
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'target':<22} {'import':>9} {'rss':>9}  heavy modules loaded")
+    for target in args.targets:
+        r = best_of(target, args.repeat, args.warmup)
+        results[target] = r
+        if "error" in r:
+            print(f"{target:<22} failed: {r['error']}")
+            continue
+        line = f"{target:<22} {r['import_s']:>8.3f}s {r['rss_mb']:>6.0f} MB  {', '.join(r['heavy']) or '-'}"
+        if "warmup_s" in r:
+            line += f"  (warmup {r['warmup_s']:.2f}s)"
+        print(line)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
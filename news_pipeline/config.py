@@ -11,10 +11,92 @@ API_KEYS = {
 
 EMBED_MODEL_NAME = "all-mpnet-base-v2"
 EMBED_CACHE_DB = "embedding_cache.sqlite"
+EMBED_CACHE_MMAP_PATH = "embedding_cache.mmap"  # prefix for the mmap backend's files
 
 # Cache settings
-EMBED_CACHE_MAX_ITEMS = 50_000  # LRU eviction
+EMBED_CACHE_BACKEND = "sqlite"  # "sqlite" (BLOB rows) or "mmap" (memory-mapped matrix)
+EMBED_CACHE_DTYPE = "float32"   # storage only: "float32", "float16" or "int8" (per-vector scaled)
+# In-memory matrices scored against (ScoringEngine, StreamingDeduper's seen
+# articles): float16 or int8 halve or quarter them; python -m bench.quantization
+# checks the error stays within tolerance
+EMBED_COMPUTE_DTYPE = "float32"
+EMBED_CACHE_MAX_ITEMS = 50_000  # LRU eviction, shared by both tiers
+EMBED_CACHE_HOT_ITEMS = 5_000   # in-process tier in front of the backend
+
+# Shared embedding server (python -m embeddings.server). Used whenever its
+# socket exists; otherwise each process loads the model itself.
+EMBED_SERVER_SOCKET = os.getenv("EMBED_SERVER_SOCKET", "/tmp/flashnews-embed.sock")
+EMBED_SERVER_MODELS = [EMBED_MODEL_NAME, "all-MiniLM-L6-v2"]  # news + flashcard retriever
+EMBED_SERVER_MAX_BATCH = 64
+EMBED_SERVER_MAX_LATENCY_MS = 10  # longest a request waits for others to batch with
 
 # Deduplication clustering
 DBSCAN_EPS = 0.20     # 1 - cosine similarity threshold (~0.8)
 DBSCAN_MIN_SAMPLES = 1
+DEDUPE_MODE = "exact"         # "exact" (all pairs) or "lsh" (approximate, for large corpora)
+DEDUPE_LSH_RECALL = 0.95      # chance a pair right at DBSCAN_EPS is found; lower = faster
+DEDUPE_LSH_BUCKET_SIZE = 64   # target articles per LSH bucket
+
+# Ranking: final score = keyword * w + semantic (cosine x 100) * w
+RANK_WEIGHTS = {
+    "keyword": 0.6,
+    "semantic": 0.4
+}
+
+# Fetch stage
+PROVIDER_URLS = {
+    "newsdata": "https://newsdata.io/api/1/news",
+    "newsapi": "https://newsapi.org/v2/everything",
+    "gnews": "https://gnews.io/api/v4/search"
+}
+FETCH_TIMEOUTS = {     # per-request connect/read timeout (seconds)
+    "newsdata": 6.0,
+    "newsapi": 6.0,
+    "gnews": 6.0
+}
+FETCH_DEADLINES = {    # wall-clock budget per provider (seconds)
+    "newsdata": 8.0,
+    "newsapi": 8.0,
+    "gnews": 8.0
+}
+FETCH_DEADLINE = 10.0  # overall cap for the whole fetch stage
+FETCH_MAX_WORKERS = 8
+
+# Response cache: identical queries within the TTL are answered locally;
+# after it, requests revalidate with ETag / Last-Modified when available
+FETCH_CACHE_DB = "http_cache.sqlite"
+FETCH_CACHE_TTLS = {   # seconds a response is served without asking again
+    "newsdata": 600,
+    "newsapi": 900,
+    "gnews": 900
+}
+FETCH_CACHE_MAX_AGE = 24 * 3600  # stale responses kept for revalidation / fallback
+
+# Token buckets sized to the free plans: NewsData 30 requests / 15 min,
+# NewsAPI and GNews 100 requests / day, with room for a burst of searches
+FETCH_RATE_LIMITS = {
+    "newsdata": {"per_second": 30 / 900, "burst": 10},
+    "newsapi": {"per_second": 100 / 86400, "burst": 10},
+    "gnews": {"per_second": 100 / 86400, "burst": 10}
+}
+
+# Streaming pipeline (streaming.py)
+STREAM_BATCH_SIZE = 16      # articles per embed / dedupe micro-batch
+STREAM_MAX_WAIT = 0.25      # seconds a partial batch waits for more articles
+STREAM_QUEUE_SIZE = 64      # items buffered between stages before producers block
+
+# Cross-run event tracking
+EVENT_INDEX_PATH = "event_index.npz"
+EVENT_TTL_SECONDS = 48 * 3600  # forget events not seen for this long
+EVENT_INDEX_LSH_BITS = 10
+
+# Polling daemon (python -m daemon)
+DAEMON_TOPICS = [t.strip() for t in os.getenv("DAEMON_TOPICS", "").split(",") if t.strip()]
+DAEMON_INTERVAL_SECONDS = 15 * 60
+DAEMON_EVENT_INDEX_PATH = "daemon_event_index.npz"  # separate from interactive runs
+# Absolute, since the daemon runs from news_pipeline/ and the app from the root
+RESULTS_DB = os.getenv("RESULTS_DB") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "results.sqlite"
+)
+RESULTS_MAX_AGE_SECONDS = 60 * 60   # older topic results are not served to the app
+RESULTS_PER_TOPIC = 50              # articles returned per topic
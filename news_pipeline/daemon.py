@@ -0,0 +1,101 @@
+"""
+Long-running poller: fetches new articles for a set of topics on a
+schedule and appends the ranked, deduped results to the ResultsStore the
+app reads from.
+
+    cd news_pipeline
+    python -m daemon [--topics "green hydrogen" "rbi policy"] [--interval 900] [--once]
+        [--metrics-port 9464]
+
+Topics default to $DAEMON_TOPICS (comma separated). Each provider keeps
+a per-topic high-water mark (newest `published_at` seen); the next cycle
+asks for articles from there on and drops anything older, so only new
+articles are embedded (through the embedding cache) and deduped against
+the daemon's own event index.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    DAEMON_TOPICS, DAEMON_INTERVAL_SECONDS, DAEMON_EVENT_INDEX_PATH, RESULTS_DB
+)
+from fetchers.parallel import iter_fetch
+from processing.event_index import EventIndex
+from processing.normalize import parse_published
+from store import ResultsStore
+from utils import metrics
+from main import keyword_workers, rank_batch
+
+def fetch_new(topic, marks):
+    """
+    (articles, new_marks): articles for `topic` published at or after each
+    provider's mark (undated ones are kept, the store drops repeats), and
+    the marks advanced to the newest article seen.
+    """
+    since = {p: parse_published(m) for p, m in marks.items()}
+    new_marks = dict(marks)
+    fresh = []
+    for provider, articles in iter_fetch(topic, since={p: s for p, s in since.items() if s}):
+        mark = since.get(provider)
+        for a in articles:
+            published = parse_published(a["published_at"])
+            if mark and published and published < mark:
+                continue
+            fresh.append(a)
+            if published and (mark is None or published > mark):
+                mark = published
+        if mark:
+            new_marks[provider] = mark.isoformat()
+    return fresh, new_marks
+
+def run_cycle(topics, store, event_index, processes=None):
+    """One poll of every topic; returns {topic: number of new results}."""
+    with ThreadPoolExecutor(max_workers=keyword_workers(topics),
+                            thread_name_prefix="poll") as pool:
+        fetched = list(pool.map(lambda t: fetch_new(t, store.watermarks(t)), topics))
+
+    raw = [a for articles, _ in fetched for a in articles]
+    metrics.count("articles_fetched_new", len(raw))
+    marks = {t: new_marks for t, (_, new_marks) in zip(topics, fetched)}
+    results = rank_batch(raw, topics, new_only=True, processes=processes,
+                         event_index=event_index) if raw else {t: [] for t in topics}
+
+    # Marks only move once the articles they cover are stored
+    store.commit_cycle(results, marks)
+    return {t: len(r) for t, r in results.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--topics", nargs="+", default=DAEMON_TOPICS)
+    parser.add_argument("--interval", type=float, default=DAEMON_INTERVAL_SECONDS)
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--once", action="store_true", help="run a single cycle and exit")
+    parser.add_argument("--metrics-port", type=int,
+                        help="serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    args = parser.parse_args()
+    if not args.topics:
+        parser.error("no topics: pass --topics or set DAEMON_TOPICS")
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+
+    store = ResultsStore(RESULTS_DB)
+    event_index = EventIndex(path=DAEMON_EVENT_INDEX_PATH)
+
+    while True:
+        start = time.monotonic()
+        event_index.expire()
+        try:
+            with metrics.span("poll_cycle"):
+                counts = run_cycle(args.topics, store, event_index, args.processes)
+            print(f"[{time.strftime('%H:%M:%S')}] new results: "
+                  + ", ".join(f"{t}: {n}" for t, n in counts.items()))
+        except Exception as e:
+            # Marks were not advanced, so the next cycle retries the same window
+            print(f"[{time.strftime('%H:%M:%S')}] cycle failed: {e}")
+            metrics.count("poll_cycle_errors")
+        if args.once:
+            break
+        time.sleep(max(0.0, args.interval - (time.monotonic() - start)))
+
+if __name__ == "__main__":
+    main()
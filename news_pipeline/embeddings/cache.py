@@ -1,58 +1,126 @@
-import sqlite3
+import atexit
 import threading
 import numpy as np
-import time
-from config import EMBED_CACHE_DB, EMBED_CACHE_MAX_ITEMS
+from config import (
+    EMBED_CACHE_BACKEND, EMBED_CACHE_DB, EMBED_CACHE_MMAP_PATH, EMBED_CACHE_DTYPE,
+    EMBED_CACHE_MAX_ITEMS, EMBED_CACHE_HOT_ITEMS
+)
+from utils.quantize import QuantizedMatrix, quantize
+from .hot import HotTier
 
 _lock = threading.Lock()
 
-def _connect():
-    conn = sqlite3.connect(EMBED_CACHE_DB, check_same_thread=False)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS cache (
-            hash TEXT PRIMARY KEY,
-            vector BLOB NOT NULL,
-            created_at REAL
-        )
-    """)
-    return conn
+def open_store(backend=EMBED_CACHE_BACKEND):
+    if backend == "sqlite":
+        from .sqlite_store import SQLiteStore
+        return SQLiteStore(EMBED_CACHE_DB, EMBED_CACHE_MAX_ITEMS, EMBED_CACHE_DTYPE)
+    if backend == "mmap":
+        from .mmap_store import MmapStore
+        return MmapStore(EMBED_CACHE_MMAP_PATH, EMBED_CACHE_MAX_ITEMS, EMBED_CACHE_DTYPE)
+    raise ValueError(f"Unknown EMBED_CACHE_BACKEND: {backend}")
 
-_conn = _connect()
+_store = open_store()
 
-def get_embedding(h):
+# Every hot entry is also in the store, so the store's budget bounds both tiers.
+_hot = HotTier(min(EMBED_CACHE_HOT_ITEMS, EMBED_CACHE_MAX_ITEMS), EMBED_CACHE_DTYPE)
+_disk_hits = 0
+_disk_misses = 0
+
+def get_embeddings(hashes):
+    """
+    Bulk lookup. Returns (found, matrix) where `found` lists the positions in
+    `hashes` that were cached and `matrix` is one contiguous float32 array
+    with a row per found position, in the same order. Rows are stored in
+    EMBED_CACHE_DTYPE and upcast here.
+    """
+    global _disk_hits, _disk_misses
     with _lock:
-        cur = _conn.execute("SELECT vector FROM cache WHERE hash=?", (h,))
-        row = cur.fetchone()
-        if not row:
-            return None
-        vec = np.frombuffer(row[0], dtype=np.float32)
-        return vec
+        hot_pos, hot_rows = _hot.lookup(hashes)
 
-def save_embedding(h, vector):
-    blob = vector.astype(np.float32).tobytes()
-    ts = time.time()
+        hot_set = set(hot_pos)
+        pos = {}
+        for i, h in enumerate(hashes):
+            if i not in hot_set:
+                pos.setdefault(h, []).append(i)
+
+        cold = list(pos)
+        hit, rows = _store.lookup(cold)
+        _disk_hits += len(hit)
+        _disk_misses += len(cold) - len(hit)
+
+        cold_pos, cold_rows = [], None
+        if hit:
+            hit_hashes = [cold[k] for k in hit]
+            _hot.put_many(hit_hashes, rows)
+            # Expand back to every requested position (duplicates included)
+            take = []
+            for k, h in enumerate(hit_hashes):
+                for i in pos[h]:
+                    cold_pos.append(i)
+                    take.append(k)
+            order = np.argsort(cold_pos, kind="stable")
+            cold_pos = [cold_pos[k] for k in order]
+            cold_rows = rows.take(np.asarray(take)[order])
+
+        _store.touch([hashes[i] for i in hot_pos] + [cold[k] for k in hit])
+
+    if not cold_pos and not hot_pos:
+        return [], np.empty((0, 0), dtype=np.float32)
+    if not cold_pos:
+        found, matrix = hot_pos, hot_rows
+    elif not hot_pos:
+        found, matrix = cold_pos, cold_rows
+    else:
+        found = sorted(hot_pos + cold_pos)
+        order = {p: k for k, p in enumerate(found)}
+        matrix = QuantizedMatrix.empty(len(found), cold_rows.shape[1], cold_rows.dtype)
+        matrix.assign([order[p] for p in hot_pos], hot_rows)
+        matrix.assign([order[p] for p in cold_pos], cold_rows)
+
+    return found, matrix.to_float32()
+
+def save_embeddings(pairs):
+    """
+    Bulk insert of (hash, vector) pairs in a single transaction.
+    Quantized once to EMBED_CACHE_DTYPE and written through to both tiers.
+    """
+    if not pairs:
+        return
+    hashes = [h for h, _ in pairs]
+    matrix = quantize(np.stack([np.asarray(v, dtype=np.float32) for _, v in pairs]),
+                      EMBED_CACHE_DTYPE)
 
     with _lock:
-        _conn.execute(
-            "REPLACE INTO cache (hash, vector, created_at) VALUES (?, ?, ?)",
-            (h, blob, ts)
-        )
-        _conn.commit()
-
-        # Enforce LRU eviction
-        cur = _conn.execute("SELECT COUNT(*) FROM cache")
-        count = cur.fetchone()[0]
-
-        if count > EMBED_CACHE_MAX_ITEMS:
-            to_remove = count - EMBED_CACHE_MAX_ITEMS
-            _conn.execute(
-                """
-                DELETE FROM cache WHERE hash IN (
-                    SELECT hash FROM cache
-                    ORDER BY created_at ASC
-                    LIMIT ?
-                )
-                """,
-                (to_remove,)
-            )
-            _conn.commit()
+        victims = _store.put_many(hashes, matrix)
+        _hot.put_many(hashes, matrix)
+        # Never keep a vector the budget has already evicted
+        _hot.discard_many(victims)
+
+def flush():
+    """Write pending access times and vectors to disk."""
+    with _lock:
+        _store.flush()
+
+atexit.register(flush)
+
+def cache_stats():
+    with _lock:
+        return {
+            "backend": EMBED_CACHE_BACKEND,
+            "dtype": EMBED_CACHE_DTYPE,
+            "hot": _hot.stats(),
+            "disk": {
+                "rows": len(_store),
+                "hits": _disk_hits,
+                "misses": _disk_misses
+            }
+        }
+
+def get_embedding(h):
+    found, matrix = get_embeddings([h])
+    if not found:
+        return None
+    return matrix[0]
+
+def save_embedding(h, vector):
+    save_embeddings([(h, vector)])
@@ -0,0 +1,122 @@
+"""
+Client for the local embedding server (embeddings/server.py).
+
+Only needs the standard library and numpy, and does not import `config`,
+so the flashcard pipeline can use it as
+`news_pipeline.embeddings.client` as well.
+
+Wire format, both directions: 4-byte big-endian header length, JSON
+header, then an optional raw payload. Requests carry
+{"model": ..., "texts": [...]}; responses carry {"shape": [n, dim]}
+followed by n * dim little-endian float32 values, or {"error": ...}.
+"""
+import json
+import os
+import socket
+import struct
+import threading
+import time
+import numpy as np
+
+DEFAULT_SOCKET = "/tmp/flashnews-embed.sock"
+CONNECT_TIMEOUT = 0.5
+REQUEST_TIMEOUT = 60.0
+RETRY_AFTER = 30.0   # seconds to stay on the in-process path after a failure
+
+_HEADER = struct.Struct(">I")
+
+class EmbeddingServerError(RuntimeError):
+    pass
+
+def send_frame(sock, header, payload=b""):
+    data = json.dumps(header).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data + payload)
+
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    while n:
+        got = sock.recv_into(view, n)
+        if not got:
+            raise ConnectionError("embedding server closed the connection")
+        view, n = view[got:], n - got
+    return bytes(buf)
+
+def recv_header(sock):
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, length))
+
+def recv_matrix(sock, shape):
+    n, dim = shape
+    data = _recv_exact(sock, n * dim * 4)
+    return np.frombuffer(data, dtype="<f4").reshape(n, dim)
+
+class EmbeddingClient:
+    """
+    Thread-safe: each thread keeps its own connection, so concurrent
+    callers reach the server at the same time and get batched together.
+    """
+
+    def __init__(self, path=DEFAULT_SOCKET, timeout=REQUEST_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(CONNECT_TIMEOUT)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            sock.settimeout(self.timeout)
+            self._local.sock = sock
+        return sock
+
+    def _drop(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def encode(self, texts, model):
+        """(len(texts), dim) float32 embeddings of `texts` with `model`."""
+        try:
+            sock = self._connect()
+            send_frame(sock, {"model": model, "texts": list(texts)})
+            header = recv_header(sock)
+            if "error" in header:
+                raise EmbeddingServerError(header["error"])
+            return recv_matrix(sock, header["shape"])
+        except (OSError, ValueError) as e:
+            # A half-read response leaves the stream unusable
+            self._drop()
+            raise EmbeddingServerError(f"embedding server at {self.path}: {e}") from e
+
+    def close(self):
+        self._drop()
+
+_clients = {}
+_down_until = {}
+_clients_lock = threading.Lock()
+
+def get_client(path=None):
+    """
+    Shared client for the server at `path` (defaults to $EMBED_SERVER_SOCKET
+    or DEFAULT_SOCKET), or None when no server is listening there or it
+    failed within the last RETRY_AFTER seconds.
+    """
+    path = path or os.getenv("EMBED_SERVER_SOCKET") or DEFAULT_SOCKET
+    if time.monotonic() < _down_until.get(path, 0.0) or not os.path.exists(path):
+        return None
+    with _clients_lock:
+        if path not in _clients:
+            _clients[path] = EmbeddingClient(path)
+        return _clients[path]
+
+def mark_down(path):
+    """Skip the server at `path` for a while after a failed request."""
+    _down_until[path] = time.monotonic() + RETRY_AFTER
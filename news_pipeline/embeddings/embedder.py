@@ -1,9 +1,60 @@
 import hashlib
-from sentence_transformers import SentenceTransformer
-from config import EMBED_MODEL_NAME
-from .cache import get_embedding, save_embedding
+import threading
+from config import EMBED_MODEL_NAME, EMBED_SERVER_SOCKET
+from utils import metrics
+from .cache import get_embedding, save_embedding, get_embeddings, save_embeddings
+from .client import get_client, mark_down, EmbeddingServerError
 
-model = SentenceTransformer(EMBED_MODEL_NAME)
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """
+    Process-wide SentenceTransformer, loaded on first use. Importing this
+    module (and everything that imports it) stays cheap until the first
+    article actually needs encoding.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(EMBED_MODEL_NAME)
+    return _model
+
+def warmup(background=False):
+    """
+    Load the model and run one tiny encode so the first real request does
+    not pay for weight loading and lazy kernel setup. With `background`,
+    does it on a daemon thread and returns the thread. When the embedding
+    server is running this only opens the connection to it.
+    """
+    def run():
+        encode(["warmup"])
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="embedder-warmup", daemon=True)
+    thread.start()
+    return thread
+
+def encode(texts, batch_size=16):
+    """
+    Embed `texts` through the shared embedding server when one is running,
+    else with the in-process model.
+    """
+    metrics.count("texts_encoded", len(texts))
+    client = get_client(EMBED_SERVER_SOCKET)
+    if client is not None:
+        try:
+            with metrics.span("encode", backend="server"):
+                return client.encode(texts, EMBED_MODEL_NAME)
+        except EmbeddingServerError as e:
+            print(f"Embedding server unavailable, encoding locally: {e}")
+            mark_down(EMBED_SERVER_SOCKET)
+    with metrics.span("encode", backend="local"):
+        return get_model().encode(texts, batch_size=batch_size, convert_to_numpy=True)
 
 def make_hash(text):
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -17,31 +68,42 @@ def embed_text(text):
     h = make_hash(text)
     vec = get_embedding(h)
     if vec is not None:
+        metrics.count("cache_hits", cache="embedding")
         return vec
 
-    vec = model.encode(text, convert_to_numpy=True)
+    metrics.count("cache_misses", cache="embedding")
+    vec = encode([text])[0]
     save_embedding(h, vec)
     return vec
 
-def embed_articles(articles, batch_size=16):
-    texts, idxs = [], []
-
-    for i, a in enumerate(articles):
-        combined = a["title"] + "\n" + a["summary"]
-        h = make_hash(combined)
-        a["_hash"] = h
-
-        cached = get_embedding(h)
-        if cached is not None:
-            a["embedding"] = cached
-        else:
-            texts.append(combined)
-            idxs.append(i)
-
-    if texts:
-        vectors = model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
-        for article_i, vec in zip(idxs, vectors):
-            articles[article_i]["embedding"] = vec
-            save_embedding(articles[article_i]["_hash"], vec)
+def embed_texts(texts, batch_size=16):
+    """
+    Cached embeddings of `texts`, in order: one bulk cache lookup and one
+    encode call for the misses.
+    """
+    hashes = [make_hash(t) for t in texts]
+    vectors = [None] * len(texts)
 
+    # One bulk lookup; cached rows are views into a single matrix
+    with metrics.span("embed_cache_lookup"):
+        found, matrix = get_embeddings(hashes)
+    metrics.count("cache_hits", len(found), cache="embedding")
+    metrics.count("cache_misses", len(texts) - len(found), cache="embedding")
+    for row, i in enumerate(found):
+        vectors[i] = matrix[row]
+
+    idxs = [i for i, vec in enumerate(vectors) if vec is None]
+    if idxs:
+        fresh = encode([texts[i] for i in idxs], batch_size=batch_size)
+        for i, vec in zip(idxs, fresh):
+            vectors[i] = vec
+        save_embeddings([(hashes[i], vectors[i]) for i in idxs])
+
+    return vectors
+
+def embed_articles(articles, batch_size=16):
+    texts = [a["title"] + "\n" + a["summary"] for a in articles]
+    for a, text, vec in zip(articles, texts, embed_texts(texts, batch_size)):
+        a["_hash"] = make_hash(text)
+        a["embedding"] = vec
     return articles
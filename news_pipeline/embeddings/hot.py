@@ -0,0 +1,97 @@
+from collections import OrderedDict
+import numpy as np
+from utils.quantize import QuantizedMatrix
+
+class HotTier:
+    """
+    Bounded in-process LRU of embeddings: an ordered dict of hash -> row
+    in one preallocated matrix of the cache dtype. Not thread-safe; callers lock.
+    """
+
+    def __init__(self, capacity, dtype="float32"):
+        self.capacity = max(0, int(capacity))
+        self.dtype = np.dtype(dtype)
+        self._slots = OrderedDict()
+        self._matrix = None
+        self._free = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, h):
+        return h in self._slots
+
+    def lookup(self, hashes):
+        """
+        Returns (positions, rows): positions in `hashes` that are resident and
+        the matching rows gathered into one contiguous QuantizedMatrix.
+        """
+        positions, slots = [], []
+        for i, h in enumerate(hashes):
+            slot = self._slots.get(h)
+            if slot is None:
+                self.misses += 1
+                continue
+            self._slots.move_to_end(h)
+            self.hits += 1
+            positions.append(i)
+            slots.append(slot)
+
+        if not positions:
+            return [], None
+        return positions, self._matrix.take(slots)
+
+    def put_many(self, hashes, matrix):
+        """`matrix` is a QuantizedMatrix in this tier's dtype."""
+        if not self.capacity or not len(hashes):
+            return
+        if self._matrix is None or self._matrix.shape[1] != matrix.shape[1]:
+            self._reset(matrix.shape[1])
+
+        slots = []
+        for h in hashes:
+            slot = self._slots.get(h)
+            if slot is not None:
+                self._slots.move_to_end(h)
+            elif self._free:
+                slot = self._free.pop()
+                self._slots[h] = slot
+            elif len(self._slots) < self.capacity:
+                slot = len(self._slots)
+                self._slots[h] = slot
+            else:
+                _, slot = self._slots.popitem(last=False)
+                self.evictions += 1
+                self._slots[h] = slot
+            slots.append(slot)
+
+        # Later duplicates win, matching a row-by-row write
+        last = {}
+        for k, slot in enumerate(slots):
+            last[slot] = k
+        self._matrix.assign(list(last), matrix.take(list(last.values())))
+
+    def discard_many(self, hashes):
+        for h in hashes:
+            slot = self._slots.pop(h, None)
+            if slot is not None:
+                self._free.append(slot)
+
+    def _reset(self, dim):
+        self._slots.clear()
+        self._free = []
+        self._matrix = QuantizedMatrix.empty(self.capacity, dim, self.dtype)
+
+    def stats(self):
+        return {
+            "size": len(self._slots),
+            "capacity": self.capacity,
+            "dtype": self.dtype.name,
+            "bytes": self._matrix.nbytes if self._matrix is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,50 @@
+"""
+Convert an existing SQLite embedding cache into the mmap backend.
+
+    cd news_pipeline
+    python -m embeddings.migrate [--src embedding_cache.sqlite]
+                                 [--dst embedding_cache.mmap] [--dtype int8]
+
+Then set EMBED_CACHE_BACKEND = "mmap" in config.py.
+"""
+import argparse
+import os
+from config import (
+    EMBED_CACHE_DB, EMBED_CACHE_MMAP_PATH, EMBED_CACHE_DTYPE, EMBED_CACHE_MAX_ITEMS
+)
+from utils.quantize import DTYPES
+from .sqlite_store import SQLiteStore
+from .mmap_store import MmapStore
+
+def migrate(src=EMBED_CACHE_DB, dst=EMBED_CACHE_MMAP_PATH, dtype=EMBED_CACHE_DTYPE,
+            max_items=EMBED_CACHE_MAX_ITEMS):
+    if not os.path.exists(src):
+        raise FileNotFoundError(f"SQLite cache not found at: {src}")
+    if os.path.exists(dst + ".meta.json"):
+        raise FileExistsError(f"{dst} already exists; remove its files first")
+
+    source = SQLiteStore(src, max_items, dtype)
+    target = MmapStore(dst, max_items, dtype)
+
+    # Oldest first, so if the source is over budget the target keeps the
+    # most recently used vectors.
+    copied = 0
+    for hashes, matrix, last_access in source.iter_rows():
+        target.put_many(hashes, matrix, last_access)
+        copied += len(hashes)
+
+    target.flush()
+    return copied, len(target)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--src", default=EMBED_CACHE_DB)
+    parser.add_argument("--dst", default=EMBED_CACHE_MMAP_PATH)
+    parser.add_argument("--dtype", default=EMBED_CACHE_DTYPE, choices=DTYPES)
+    args = parser.parse_args()
+
+    copied, stored = migrate(args.src, args.dst, args.dtype)
+    print(f"Copied {copied} vectors from {args.src} into {args.dst} ({stored} stored)")
+
+if __name__ == "__main__":
+    main()
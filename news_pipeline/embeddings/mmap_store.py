@@ -0,0 +1,225 @@
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+import numpy as np
+from utils.quantize import QuantizedMatrix
+
+# One fixed-size record per slot; an all-zero key marks a free slot.
+# Keys are raw (void) bytes so digests ending in NUL survive a round trip.
+INDEX_DTYPE = np.dtype([("key", "V32"), ("last_access", "<f8")])
+EMPTY_KEY = bytes(32)
+
+class MmapStore:
+    """
+    Fixed-stride memory-mapped vector matrix plus a parallel slot index.
+
+    <path>.vectors    capacity x dim matrix (float32, float16 or int8)
+    <path>.scales     capacity float32 per-row scales (int8 only)
+    <path>.index      capacity INDEX_DTYPE records (sha256 digest, access time)
+    <path>.meta.json  dim / dtype / capacity
+    <path>.lock       flock target; holds a write generation counter
+
+    Files are created on the first insert, once the vector width is known.
+    Not thread-safe; the cache front locks.
+
+    Safe to share between processes (e.g. the daemon and main.py): reads
+    take a shared flock and writes an exclusive one. Every write bumps the
+    generation, and a process whose slot map is older than it rebuilds the
+    map from the index before using it.
+    """
+
+    def __init__(self, path, max_items, dtype="float32"):
+        self.path = path
+        self.capacity = max_items
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float16, np.int8):
+            raise ValueError(f"Unsupported mmap dtype: {dtype}")
+        self.evict_batch = max(1, max_items // 50)
+        self._data = None
+        self._scales = None
+        self._index = None
+        self._slots = {}
+        self._free = []
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(fd).st_size < 8:
+            os.ftruncate(fd, 8)
+        self._lock_fd = fd
+        self._generation = np.memmap(self.path + ".lock", dtype="<u8", mode="r+", shape=(1,))
+        self._seen = None
+        with self._locked(exclusive=False):
+            pass
+
+    @property
+    def _meta_path(self):
+        return self.path + ".meta.json"
+
+    @contextmanager
+    def _locked(self, exclusive):
+        """
+        Hold the store's flock, with the slot map brought up to date with
+        writes from other processes. Exclusive holders bump the generation.
+        """
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            if self._data is None:
+                if os.path.exists(self._meta_path):
+                    self._open()
+            elif self._seen != int(self._generation[0]):
+                self._load_slots()
+            self._seen = int(self._generation[0])
+            yield
+            if exclusive:
+                self._generation[0] += 1
+                self._seen = int(self._generation[0])
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _open(self):
+        with open(self._meta_path) as f:
+            meta = json.load(f)
+        if np.dtype(meta["dtype"]) != self.dtype or meta["capacity"] != self.capacity:
+            raise ValueError(
+                f"{self.path} was created with dtype={meta['dtype']}, "
+                f"capacity={meta['capacity']}; re-run the migration to change them"
+            )
+        self._map(meta["dim"], "r+")
+
+    def _create(self, dim):
+        with open(self._meta_path, "w") as f:
+            json.dump({"dim": dim, "dtype": self.dtype.name, "capacity": self.capacity}, f)
+        self._map(dim, "w+")
+
+    def _map(self, dim, mode):
+        self._data = np.memmap(self.path + ".vectors", dtype=self.dtype,
+                               mode=mode, shape=(self.capacity, dim))
+        if self.dtype == np.int8:
+            self._scales = np.memmap(self.path + ".scales", dtype=np.float32,
+                                     mode=mode, shape=(self.capacity,))
+        self._index = np.memmap(self.path + ".index", dtype=INDEX_DTYPE,
+                                mode=mode, shape=(self.capacity,))
+        self._load_slots()
+
+    def _load_slots(self):
+        keys = self._index["key"].tolist()
+        self._slots = {k: i for i, k in enumerate(keys) if k != EMPTY_KEY}
+        self._free = [i for i in range(self.capacity - 1, -1, -1) if keys[i] == EMPTY_KEY]
+
+    def __len__(self):
+        return len(self._slots)
+
+    def vector(self, h):
+        """
+        Copy of one stored row, or None. int8 rows are returned as
+        (row, scale).
+        """
+        key = bytes.fromhex(h)
+        with self._locked(exclusive=False):
+            slot = self._slots.get(key)
+            if slot is None or self._index["key"][slot].tobytes() != key:
+                return None
+            if self._scales is not None:
+                return np.array(self._data[slot]), float(self._scales[slot])
+            return np.array(self._data[slot])
+
+    def lookup(self, hashes):
+        """
+        `hashes` must be unique. Returns (found, matrix): indices into
+        `hashes` that are stored and their rows gathered with one
+        fancy-index into a QuantizedMatrix.
+        """
+        with self._locked(exclusive=False):
+            if self._data is None:
+                return [], None
+            found, keys, slots = [], [], []
+            for i, h in enumerate(hashes):
+                key = bytes.fromhex(h)
+                slot = self._slots.get(key)
+                if slot is not None:
+                    found.append(i)
+                    keys.append(key)
+                    slots.append(slot)
+            if not found:
+                return [], None
+            # A slot another process reused is a miss, never someone else's vector
+            stored = self._index["key"][slots].tolist()
+            ok = [k for k in range(len(slots)) if stored[k] == keys[k]]
+            if len(ok) < len(slots):
+                found = [found[k] for k in ok]
+                slots = [slots[k] for k in ok]
+                if not found:
+                    return [], None
+            scales = self._scales[slots] if self._scales is not None else None
+            return found, QuantizedMatrix(self._data[slots], scales)
+
+    def touch(self, hashes):
+        with self._locked(exclusive=False):
+            slots = [s for s in (self._slots.get(bytes.fromhex(h)) for h in hashes) if s is not None]
+            if slots:
+                self._index["last_access"][slots] = time.time()
+
+    def flush(self):
+        if self._data is not None:
+            self._data.flush()
+            self._index.flush()
+            if self._scales is not None:
+                self._scales.flush()
+
+    def put_many(self, hashes, matrix, last_access=None):
+        """
+        Write a QuantizedMatrix (in the store dtype) into free (or evicted)
+        slots. Returns evicted hashes.
+        """
+        if not len(hashes):
+            return []
+        with self._locked(exclusive=True):
+            return self._put_many(hashes, matrix, last_access)
+
+    def _put_many(self, hashes, matrix, last_access):
+        if self._data is None:
+            self._create(matrix.shape[1])
+        if last_access is None:
+            last_access = np.full(len(hashes), time.time())
+
+        if len(hashes) > self.capacity:
+            hashes = hashes[-self.capacity:]
+            matrix = matrix.take(slice(-self.capacity, None))
+            last_access = last_access[-self.capacity:]
+
+        victims, slots = [], []
+        for h in hashes:
+            key = bytes.fromhex(h)
+            slot = self._slots.get(key)
+            if slot is None:
+                if not self._free:
+                    victims.extend(self._evict(self.evict_batch))
+                slot = self._free.pop()
+                self._slots[key] = slot
+                self._index["key"][slot] = np.array(key, dtype="V32")
+            # Pin until the batch is written so eviction can't pick it
+            self._index["last_access"][slot] = np.inf
+            slots.append(slot)
+
+        self._data[slots] = matrix.data
+        if self._scales is not None:
+            self._scales[slots] = matrix.scales
+        self._index["last_access"][slots] = last_access
+        return victims
+
+    def _evict(self, n):
+        occupied = np.fromiter(self._slots.values(), dtype=np.int64, count=len(self._slots))
+        n = min(n, len(occupied))
+        if n <= 0:
+            return []
+        access = self._index["last_access"][occupied]
+        oldest = occupied[np.argpartition(access, n - 1)[:n]]
+
+        victims = []
+        for slot in oldest.tolist():
+            key = self._index["key"][slot].tobytes()
+            del self._slots[key]
+            victims.append(key.hex())
+            self._free.append(slot)
+        self._index["key"][oldest] = np.array(EMPTY_KEY, dtype="V32")
+        return victims
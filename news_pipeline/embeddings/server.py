@@ -0,0 +1,152 @@
+"""
+Local embedding server: loads each model once and serves encode requests
+from any number of processes over a Unix socket.
+
+    cd news_pipeline
+    python -m embeddings.server [--socket PATH] [--models all-mpnet-base-v2 ...]
+                                [--max-batch 64] [--max-latency-ms 10]
+
+Concurrent requests for the same model are merged into micro-batches: a
+batch is encoded as soon as it holds --max-batch texts, or --max-latency-ms
+after its first request arrived, whichever comes first. Clients
+(embeddings/client.py) fall back to in-process encoding when the socket
+is missing or the server fails.
+"""
+import argparse
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from config import (
+    EMBED_SERVER_SOCKET, EMBED_SERVER_MODELS,
+    EMBED_SERVER_MAX_BATCH, EMBED_SERVER_MAX_LATENCY_MS
+)
+from .client import send_frame, recv_header
+
+class MicroBatcher:
+    """
+    Collects (texts, Future) requests on a queue and encodes them together
+    on one worker thread. A request larger than `max_batch` is still
+    encoded whole, on its own.
+    """
+
+    def __init__(self, model, max_batch=EMBED_SERVER_MAX_BATCH,
+                 max_latency=EMBED_SERVER_MAX_LATENCY_MS / 1000):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self._queue = queue.Queue()
+        self.batches = 0
+        self.texts = 0
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, texts):
+        future = Future()
+        self._queue.put((texts, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_latency
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [t for item, _ in batch for t in item]
+            try:
+                vectors = self.model.encode(
+                    texts, batch_size=max(len(texts), 1), convert_to_numpy=True
+                ).astype("<f4", copy=False)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(texts)
+            start = 0
+            for item, future in batch:
+                future.set_result(vectors[start:start + len(item)])
+                start += len(item)
+
+class EmbeddingHandler(socketserver.StreamRequestHandler):
+    """One connection, any number of sequential requests."""
+
+    def handle(self):
+        while True:
+            try:
+                request = recv_header(self.request)
+            except (ConnectionError, OSError):
+                return
+
+            batcher = self.server.batchers.get(request.get("model"))
+            if batcher is None:
+                send_frame(self.request, {"error": f"model not served: {request.get('model')}"})
+                continue
+            try:
+                vectors = batcher.submit(request["texts"]).result()
+            except Exception as e:
+                send_frame(self.request, {"error": f"{type(e).__name__}: {e}"})
+                continue
+            vectors = np.ascontiguousarray(vectors)
+            send_frame(self.request, {"shape": list(vectors.shape)}, vectors.tobytes())
+
+class EmbeddingServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128  # a burst of new clients must not hit EAGAIN
+
+    def __init__(self, path, batchers):
+        self.batchers = batchers
+        if os.path.exists(path):
+            os.unlink(path)  # stale socket from a previous run
+        super().__init__(path, EmbeddingHandler)
+
+def load_batchers(models, max_batch, max_latency):
+    from sentence_transformers import SentenceTransformer
+
+    batchers = {}
+    for name in models:
+        model = SentenceTransformer(name)
+        model.encode(["warmup"], convert_to_numpy=True)
+        batchers[name] = MicroBatcher(model, max_batch, max_latency)
+    return batchers
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--socket", default=EMBED_SERVER_SOCKET)
+    parser.add_argument("--models", nargs="+", default=EMBED_SERVER_MODELS)
+    parser.add_argument("--max-batch", type=int, default=EMBED_SERVER_MAX_BATCH)
+    parser.add_argument("--max-latency-ms", type=float, default=EMBED_SERVER_MAX_LATENCY_MS)
+    args = parser.parse_args()
+
+    batchers = load_batchers(args.models, args.max_batch, args.max_latency_ms / 1000)
+    server = EmbeddingServer(args.socket, batchers)
+    print(f"Serving {', '.join(args.models)} on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+        for name, b in batchers.items():
+            print(f"{name}: {b.texts} texts in {b.batches} batches")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import sqlite3
+import time
+import numpy as np
+from utils.quantize import QuantizedMatrix, quantize
+
+# SQLite's default host-parameter limit is 999 on older builds
+CHUNK_SIZE = 500
+
+# Reads only record access times in memory; they are written back in one
+# executemany once this many are pending (and always before eviction).
+TOUCH_FLUSH = 256
+
+def _chunks(seq, size=CHUNK_SIZE):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+class SQLiteStore:
+    """
+    One BLOB row per vector, stored as `dtype` (int8 rows carry a scale).
+    Not thread-safe; the cache front locks.
+    """
+
+    def __init__(self, path, max_items, dtype="float32"):
+        self.path = path
+        self.max_items = max_items
+        self.dtype = np.dtype(dtype)
+        # Evict only once we overshoot by this much, then trim back to the
+        # limit, so eviction runs once per batch of inserts.
+        self.evict_slack = max(1, max_items // 50)
+        self._conn = self._connect()
+        # Upper bound on the row count; re-synced with COUNT(*) only when it
+        # suggests we are over budget.
+        self._count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        self._touched = {}
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                hash TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                created_at REAL,
+                last_access REAL,
+                dtype TEXT NOT NULL DEFAULT 'float32',
+                scale REAL
+            )
+        """)
+        # Caches created before access tracking / quantization existed
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(cache)")]
+        if "last_access" not in columns:
+            with conn:
+                conn.execute("ALTER TABLE cache ADD COLUMN last_access REAL")
+                conn.execute("UPDATE cache SET last_access = created_at")
+        if "dtype" not in columns:
+            with conn:
+                conn.execute("ALTER TABLE cache ADD COLUMN dtype TEXT NOT NULL DEFAULT 'float32'")
+                conn.execute("ALTER TABLE cache ADD COLUMN scale REAL")
+        conn.execute("DROP INDEX IF EXISTS cache_created_at")
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache (last_access)")
+        return conn
+
+    def __len__(self):
+        return self._count
+
+    def lookup(self, hashes):
+        """
+        `hashes` must be unique. Returns (found, matrix): indices into
+        `hashes` that are stored and their vectors as one QuantizedMatrix
+        in the store dtype.
+        """
+        rows = {}
+        for chunk in _chunks(list(hashes)):
+            marks = ",".join("?" * len(chunk))
+            cur = self._conn.execute(
+                f"SELECT hash, vector, dtype, scale FROM cache WHERE hash IN ({marks})",
+                chunk
+            )
+            rows.update((r[0], r[1:]) for r in cur.fetchall())
+
+        found = [i for i, h in enumerate(hashes) if h in rows]
+        if not found:
+            return [], None
+        return found, self._decode([rows[hashes[i]] for i in found])
+
+    def _decode(self, rows):
+        """(blob, dtype, scale) rows -> QuantizedMatrix in the store dtype."""
+        dtypes = {r[1] for r in rows}
+        if dtypes == {self.dtype.name}:
+            data = np.frombuffer(
+                bytearray().join(r[0] for r in rows), dtype=self.dtype
+            ).reshape(len(rows), -1)
+            scales = None
+            if self.dtype == np.int8:
+                scales = np.array([r[2] for r in rows], dtype=np.float32)
+            return QuantizedMatrix(data, scales)
+
+        # Rows written under another EMBED_CACHE_DTYPE: go via float32
+        vectors = [np.frombuffer(blob, dtype=dtype).astype(np.float32) * (scale or 1.0)
+                   for blob, dtype, scale in rows]
+        return quantize(np.stack(vectors), self.dtype)
+
+    def touch(self, hashes):
+        ts = time.time()
+        for h in hashes:
+            self._touched[h] = ts
+        if len(self._touched) >= TOUCH_FLUSH:
+            self.flush()
+
+    def flush(self):
+        if not self._touched:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE cache SET last_access = ? WHERE hash = ?",
+                [(ts, h) for h, ts in self._touched.items()]
+            )
+        self._touched.clear()
+
+    def put_many(self, hashes, matrix, last_access=None):
+        """
+        Insert a QuantizedMatrix (in the store dtype) in one transaction.
+        Returns the hashes evicted to make room.
+        """
+        ts = time.time()
+        if last_access is None:
+            last_access = [ts] * len(hashes)
+        scales = matrix.scales.tolist() if matrix.scales is not None else [None] * len(hashes)
+        dtype = matrix.dtype.name
+        rows = [
+            (h, v.tobytes(), ts, la, dtype, sc)
+            for h, v, la, sc in zip(hashes, matrix.data, last_access, scales)
+        ]
+        if not rows:
+            return []
+
+        with self._conn:
+            self._conn.executemany(
+                "REPLACE INTO cache (hash, vector, created_at, last_access, dtype, scale) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        self._count += len(rows)
+
+        if self._count > self.max_items + self.evict_slack:
+            return self._evict()
+        return []
+
+    def _evict(self):
+        self.flush()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if self._count <= self.max_items:
+            return []
+
+        to_remove = self._count - self.max_items
+        victims = [row[0] for row in self._conn.execute(
+            "SELECT hash FROM cache ORDER BY last_access ASC LIMIT ?", (to_remove,)
+        )]
+        with self._conn:
+            for chunk in _chunks(victims):
+                marks = ",".join("?" * len(chunk))
+                self._conn.execute(f"DELETE FROM cache WHERE hash IN ({marks})", chunk)
+        self._count -= len(victims)
+        return victims
+
+    def iter_rows(self, batch_size=CHUNK_SIZE):
+        """
+        Yields (hashes, matrix, last_access) batches, oldest access first,
+        with `matrix` a QuantizedMatrix in the store dtype.
+        """
+        self.flush()
+        cur = self._conn.execute(
+            "SELECT hash, vector, dtype, scale, COALESCE(last_access, created_at, 0) "
+            "FROM cache ORDER BY last_access ASC"
+        )
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                return
+            matrix = self._decode([r[1:4] for r in rows])
+            yield [r[0] for r in rows], matrix, [r[4] for r in rows]
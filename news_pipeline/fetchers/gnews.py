@@ -1,8 +1,14 @@
-import requests
 from processing.normalize import normalize_article
+from config import PROVIDER_URLS, FETCH_TIMEOUTS
+from .http import provider_get, ProviderError
 
-def fetch_gnews(keyword, api_key, country="in"):
-    url = "https://gnews.io/api/v4/search"
+def search_gnews(keyword, api_key, country="in", session=None, timeout=None, url=None,
+                 since=None):
+    """
+    Query GNews and return normalized articles, optionally only those
+    published since the UTC datetime `since`.
+    Raises on transport errors and API error payloads.
+    """
     params = {
         'token': api_key,
         'q': keyword,
@@ -11,22 +17,36 @@ def fetch_gnews(keyword, api_key, country="in"):
         'sortby': 'publishedAt',
         'max': 25
     }
+    if since is not None:
+        params['from'] = since.strftime("%Y-%m-%dT%H:%M:%SZ")
+    data = provider_get(
+        "gnews",
+        url or PROVIDER_URLS["gnews"],
+        params,
+        timeout or FETCH_TIMEOUTS["gnews"],
+        session=session,
+        ok=lambda data: "errors" not in data
+    )
+    if "errors" in data:
+        raise ProviderError(data["errors"])
+    return [
+        normalize_article(
+            item.get("title"),
+            item.get("url"),
+            item.get("source", {}).get("name"),
+            item.get("description"),
+            item.get("publishedAt"),
+            item.get("image")
+        )
+        for item in data.get("articles", [])
+    ]
+
+def fetch_gnews(keyword, api_key, country="in", **kwargs):
     try:
-        data = requests.get(url, params=params).json()
-        if "errors" in data:
-            print("GNews Error:", data["errors"])
-            return []
-        return [
-            normalize_article(
-                item.get("title"),
-                item.get("url"),
-                item.get("source", {}).get("name"),
-                item.get("description"),
-                item.get("publishedAt"),
-                item.get("image")
-            )
-            for item in data.get("articles", [])
-        ]
+        return search_gnews(keyword, api_key, country, **kwargs)
+    except ProviderError as e:
+        print("GNews Error:", e)
+        return []
     except Exception as e:
         print("GNews Exception:", e)
         return []
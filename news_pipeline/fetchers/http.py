@@ -0,0 +1,141 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from config import FETCH_CACHE_DB, FETCH_CACHE_TTLS, FETCH_CACHE_MAX_AGE, FETCH_RATE_LIMITS
+from utils import metrics
+from .ratelimit import TokenBucket
+from .response_cache import ResponseCache, request_key
+
+_session = None
+_session_lock = threading.Lock()
+
+class ProviderError(Exception):
+    """The provider answered, but with an error payload."""
+
+class RateLimited(ProviderError):
+    """No request budget left for this provider (and nothing cached)."""
+
+def get_session():
+    """
+    Shared keep-alive session for all fetchers, created on first use.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+_cache = None
+_buckets = {}
+_state_lock = threading.Lock()
+_inflight = {}
+_stats = {"hits": 0, "misses": 0, "revalidated": 0, "stale": 0, "collapsed": 0, "throttled": 0}
+
+def _count(name):
+    with _state_lock:
+        _stats[name] += 1
+    metrics.count("http_cache", event=name)
+
+def http_stats():
+    """Counts of cache hits, 304 revalidations, stale fallbacks, etc."""
+    with _state_lock:
+        return dict(_stats)
+
+def _get_cache():
+    global _cache
+    with _state_lock:
+        if _cache is None:
+            _cache = ResponseCache(FETCH_CACHE_DB, FETCH_CACHE_MAX_AGE)
+        return _cache
+
+def _bucket(provider):
+    with _state_lock:
+        if provider not in _buckets:
+            limit = FETCH_RATE_LIMITS.get(provider, {"per_second": 1.0, "burst": 5})
+            _buckets[provider] = TokenBucket(limit["per_second"], limit["burst"])
+        return _buckets[provider]
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+def _singleflight(key, fn):
+    """Run fn() once for concurrent callers with the same key; all get its result."""
+    with _state_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+    if not leader:
+        _count("collapsed")
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = fn()
+        return flight.result
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _state_lock:
+            del _inflight[key]
+        flight.done.set()
+
+def provider_get(provider, url, params, timeout, session=None, ok=None):
+    """
+    GET `url` and return its JSON, going through the response cache, the
+    provider's token bucket and single-flight collapsing of identical
+    concurrent requests. Only responses for which `ok(data)` holds are
+    cached, so error payloads are retried next time.
+
+    Within FETCH_CACHE_TTLS[provider] the cached JSON is returned without
+    a request. After that the request carries If-None-Match /
+    If-Modified-Since, and a 304 reuses the cached body. When the bucket
+    is empty for longer than `timeout`, a stale cached response is
+    returned if there is one, else RateLimited is raised.
+    """
+    cache = _get_cache()
+    key = request_key(provider, url, params)
+    entry = cache.get(key)
+    if entry is not None and time.time() - entry[3] < FETCH_CACHE_TTLS.get(provider, 0):
+        _count("hits")
+        return entry[0]
+
+    def fetch():
+        if not _bucket(provider).acquire(timeout):
+            _count("throttled")
+            if entry is not None:
+                _count("stale")
+                return entry[0]
+            raise RateLimited(f"{provider}: local rate limit reached")
+
+        headers = {}
+        if entry is not None:
+            if entry[1]:
+                headers["If-None-Match"] = entry[1]
+            if entry[2]:
+                headers["If-Modified-Since"] = entry[2]
+        resp = (session or get_session()).get(url, params=params, headers=headers, timeout=timeout)
+        if resp.status_code == 304 and entry is not None:
+            _count("revalidated")
+            cache.touch(key)
+            return entry[0]
+
+        _count("misses")
+        data = resp.json()
+        if ok is None or ok(data):
+            cache.put(key, data, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        return data
+
+    return _singleflight(key, fetch)
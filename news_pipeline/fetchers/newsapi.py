@@ -1,10 +1,18 @@
-import requests
 from datetime import datetime, timedelta
 from processing.normalize import normalize_article
+from config import PROVIDER_URLS, FETCH_TIMEOUTS
+from .http import provider_get, ProviderError
 
-def fetch_newsapi(keyword, api_key):
-    url = "https://newsapi.org/v2/everything"
-    since = (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d")
+def search_newsapi(keyword, api_key, session=None, timeout=None, url=None, since=None):
+    """
+    Query NewsAPI and return normalized articles, published since the
+    UTC datetime `since` (default: the last two days).
+    Raises on transport errors and API error payloads.
+    """
+    if since is not None:
+        since = since.strftime("%Y-%m-%dT%H:%M:%S")
+    else:
+        since = (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d")
     params = {
         "q": keyword,
         "apiKey": api_key,
@@ -13,22 +21,34 @@ def fetch_newsapi(keyword, api_key):
         "from": since,
         "pageSize": 25
     }
+    data = provider_get(
+        "newsapi",
+        url or PROVIDER_URLS["newsapi"],
+        params,
+        timeout or FETCH_TIMEOUTS["newsapi"],
+        session=session,
+        ok=lambda data: data.get("status") == "ok"
+    )
+    if data.get("status") != "ok":
+        raise ProviderError(data.get("message"))
+    return [
+        normalize_article(
+            item.get("title"),
+            item.get("url"),
+            item.get("source", {}).get("name"),
+            item.get("description"),
+            item.get("publishedAt"),
+            item.get("urlToImage")
+        )
+        for item in data.get("articles", [])
+    ]
+
+def fetch_newsapi(keyword, api_key, **kwargs):
     try:
-        data = requests.get(url, params=params).json()
-        if data.get("status") != "ok":
-            print("NewsAPI error:", data.get("message"))
-            return []
-        return [
-            normalize_article(
-                item.get("title"),
-                item.get("url"),
-                item.get("source", {}).get("name"),
-                item.get("description"),
-                item.get("publishedAt"),
-                item.get("urlToImage")
-            )
-            for item in data.get("articles", [])
-        ]
+        return search_newsapi(keyword, api_key, **kwargs)
+    except ProviderError as e:
+        print("NewsAPI error:", e)
+        return []
     except Exception as e:
         print("NewsAPI Exception:", e)
         return []
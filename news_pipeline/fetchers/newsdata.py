@@ -1,8 +1,15 @@
-import requests
-from processing.normalize import normalize_article
+from processing.normalize import normalize_article, parse_published
+from config import PROVIDER_URLS, FETCH_TIMEOUTS
+from .http import provider_get, ProviderError
 
-def fetch_newsdata(keyword, api_key, country="in", category="business"):
-    url = "https://newsdata.io/api/1/news"
+def search_newsdata(keyword, api_key, country="in", category="business",
+                    session=None, timeout=None, url=None, since=None):
+    """
+    Query NewsData and return normalized articles. The latest-news endpoint
+    has no time filter, so `since` (a UTC datetime) is applied to the
+    returned items.
+    Raises on transport errors and API error payloads.
+    """
     params = {
         'apikey': api_key,
         'q': keyword,
@@ -10,22 +17,38 @@ def fetch_newsdata(keyword, api_key, country="in", category="business"):
         'country': country,
         'category': category
     }
+    data = provider_get(
+        "newsdata",
+        url or PROVIDER_URLS["newsdata"],
+        params,
+        timeout or FETCH_TIMEOUTS["newsdata"],
+        session=session,
+        ok=lambda data: data.get("status") == "success"
+    )
+    if data.get("status") != "success":
+        raise ProviderError(data.get("results"))
+    articles = [
+        normalize_article(
+            item.get("title"),
+            item.get("link"),
+            item.get("source_id"),
+            item.get("description"),
+            item.get("pubDate"),
+            item.get("image_url")
+        )
+        for item in data.get("results", [])
+    ]
+    if since is not None:
+        articles = [a for a in articles
+                    if (parse_published(a["published_at"]) or since) >= since]
+    return articles
+
+def fetch_newsdata(keyword, api_key, country="in", category="business", **kwargs):
     try:
-        data = requests.get(url, params=params).json()
-        if data.get("status") != "success":
-            print("NewsData error:", data.get("results"))
-            return []
-        return [
-            normalize_article(
-                item.get("title"),
-                item.get("link"),
-                item.get("source_id"),
-                item.get("description"),
-                item.get("pubDate"),
-                item.get("image_url")
-            )
-            for item in data.get("results", [])
-        ]
+        return search_newsdata(keyword, api_key, country, category, **kwargs)
+    except ProviderError as e:
+        print("NewsData error:", e)
+        return []
     except Exception as e:
         print("NewsData Exception:", e)
         return []
@@ -0,0 +1,129 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import API_KEYS, FETCH_DEADLINE, FETCH_DEADLINES, FETCH_MAX_WORKERS
+from utils import metrics
+from .http import ProviderError
+from .newsdata import search_newsdata
+from .newsapi import search_newsapi
+from .gnews import search_gnews
+
+# Order here is the order results are merged in
+PROVIDERS = {
+    "newsdata": search_newsdata,
+    "newsapi": search_newsapi,
+    "gnews": search_gnews
+}
+
+_executor = ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS, thread_name_prefix="fetch")
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+def _record(name, latency=None, error=False, missed=False):
+    with _stats_lock:
+        s = _stats.setdefault(name, {
+            "calls": 0,
+            "errors": 0,
+            "deadline_misses": 0,
+            "last_latency": None,
+            "total_latency": 0.0
+        })
+        if latency is not None:
+            s["calls"] += 1
+            s["last_latency"] = latency
+            s["total_latency"] += latency
+        if error:
+            s["errors"] += 1
+        if missed:
+            s["deadline_misses"] += 1
+
+def provider_stats():
+    """
+    Snapshot of per-provider call counts, error counts and latencies (seconds).
+    """
+    with _stats_lock:
+        out = {}
+        for name, s in _stats.items():
+            out[name] = dict(s)
+            out[name]["avg_latency"] = s["total_latency"] / s["calls"] if s["calls"] else None
+        return out
+
+def reset_provider_stats():
+    with _stats_lock:
+        _stats.clear()
+
+def _call(name, fn, keyword, api_key, url, since=None):
+    start = time.perf_counter()
+    try:
+        with metrics.span("fetch", provider=name):
+            if since is None:
+                articles = fn(keyword, api_key, url=url)
+            else:
+                articles = fn(keyword, api_key, url=url, since=since)
+    except Exception:
+        _record(name, time.perf_counter() - start, error=True)
+        metrics.count("fetch_errors", provider=name)
+        raise
+    _record(name, time.perf_counter() - start)
+    metrics.count("articles_fetched", len(articles), provider=name)
+    return articles
+
+def iter_fetch(keyword, providers=None, deadline=None, api_keys=None, urls=None, since=None):
+    """
+    Query all providers in parallel over the shared session and yield
+    (provider, articles) as each one finishes, fastest first.
+    Each provider gets its own deadline (capped by the stage deadline);
+    late providers are dropped.
+    `api_keys` / `urls` override config per provider (e.g. a local stub server);
+    `since` maps providers to a UTC datetime to fetch only newer articles.
+    """
+    providers = providers or list(PROVIDERS)
+    deadline = FETCH_DEADLINE if deadline is None else deadline
+    api_keys = api_keys or API_KEYS
+    urls = urls or {}
+    since = since or {}
+
+    start = time.monotonic()
+    futures = {
+        _executor.submit(
+            _call, name, PROVIDERS[name], keyword, api_keys.get(name), urls.get(name),
+            since.get(name)
+        ): name
+        for name in providers
+    }
+    budgets = {name: min(FETCH_DEADLINES.get(name, deadline), deadline) for name in providers}
+
+    pending = set(futures)
+    while pending:
+        cutoff = min(start + budgets[futures[f]] for f in pending)
+        done, _ = wait(pending, timeout=max(0.0, cutoff - time.monotonic()),
+                       return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.discard(future)
+            name = futures[future]
+            try:
+                articles = future.result()
+            except ProviderError as e:
+                print(f"{name} error:", e)
+                continue
+            except Exception as e:
+                print(f"{name} Exception:", e)
+                continue
+            yield name, articles
+
+        now = time.monotonic()
+        for future in [f for f in pending if start + budgets[futures[f]] <= now]:
+            pending.discard(future)
+            future.cancel()
+            name = futures[future]
+            _record(name, missed=True)
+            print(f"{name} missed its {budgets[name]:.1f}s deadline, skipping")
+
+def fetch_all(keyword, providers=None, deadline=None, api_keys=None, urls=None, since=None):
+    """
+    Everything iter_fetch returns, merged in provider order.
+    """
+    providers = providers or list(PROVIDERS)
+    results = dict(iter_fetch(keyword, providers, deadline, api_keys, urls, since))
+    return [a for name in providers for a in results.get(name, ())]
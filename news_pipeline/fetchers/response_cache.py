@@ -0,0 +1,71 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# Query parameters that identify the caller, not the query; left out of
+# the key so the same search shares one entry across keys/sessions
+SECRET_PARAMS = {"apikey", "apiKey", "token"}
+
+# Entries older than max_age are pruned once every this many writes
+PRUNE_EVERY = 200
+
+def request_key(provider, url, params):
+    query = sorted((k, str(v)) for k, v in params.items() if k not in SECRET_PARAMS)
+    raw = json.dumps([provider, url, query])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Provider responses (JSON text) with their ETag / Last-Modified
+    validators. Freshness is decided by the caller's TTL; entries past it
+    are kept for `max_age` seconds so they can be revalidated cheaply or
+    served when a provider is rate limited.
+    """
+
+    def __init__(self, path, max_age):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            )
+        """)
+
+    def get(self, key):
+        """(data, etag, last_modified, fetched_at) or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return (json.loads(row[0]),) + tuple(row[1:])
+
+    def put(self, key, data, etag=None, last_modified=None):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(data), etag, last_modified, now)
+            )
+            self._puts += 1
+            if self._puts % PRUNE_EVERY == 0:
+                self._conn.execute("DELETE FROM responses WHERE fetched_at < ?",
+                                   (now - self.max_age,))
+
+    def touch(self, key):
+        """Mark an entry fresh again after a 304 Not Modified."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE responses SET fetched_at = ? WHERE key = ?",
+                               (time.time(), key))
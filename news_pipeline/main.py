@@ -1,54 +1,183 @@
-from fetchers.newsdata import fetch_newsdata
-from fetchers.newsapi import fetch_newsapi
-from fetchers.gnews import fetch_gnews
+from concurrent.futures import ThreadPoolExecutor
+from config import FETCH_MAX_WORKERS
+from fetchers.parallel import PROVIDERS, fetch_all, provider_stats
+from fetchers.http import http_stats
 
-from processing.ranking import keyword_match, rank_articles
+from processing.ranking import rank_articles, keyword_vectors
+from processing.scoring import ScoringEngine
+from processing.bm25 import InvertedIndex
+from processing.lexical import lexical_dedupe
 from processing.dedupe import dedupe_events_ai
+from processing.event_index import get_event_index
 from embeddings.embedder import embed_articles
-from config import API_KEYS
+from utils import metrics
 
-import json, time
+import argparse, json, time
+import numpy as np
 
-def get_all_news(keyword):
+def get_all_news(keyword, new_only=False):
+    """
+    Fetch, filter, embed, dedupe and rank articles for `keyword`.
+    With `new_only`, stories already surfaced by an earlier run are dropped.
+    """
     print(f"\nSearching for: {keyword}\n")
-    raw = []
-
-    raw.extend(fetch_newsdata(keyword, API_KEYS["newsdata"]))
-    raw.extend(fetch_newsapi(keyword, API_KEYS["newsapi"]))
-    raw.extend(fetch_gnews(keyword, API_KEYS["gnews"]))
+    raw = fetch_all(keyword)
 
     print(f"Fetched {len(raw)} raw articles")
+    for name, s in provider_stats().items():
+        print(f"  {name}: last {s['last_latency'] or 0:.2f}s, errors {s['errors']}, "
+              f"deadline misses {s['deadline_misses']}")
+    h = http_stats()
+    print(f"  response cache: {h['hits']} hits, {h['revalidated']} revalidated, "
+          f"{h['collapsed']} collapsed, {h['throttled']} throttled")
 
-    filtered = [a for a in raw if keyword_match(a, keyword)]
+    with metrics.span("keyword_filter"):
+        index = InvertedIndex()
+        index.add(raw)
+        filtered = [raw[doc] for doc in index.match(keyword)]
+    metrics.count("articles_dropped", len(raw) - len(filtered), stage="keyword_filter")
     print(f"Relevant articles: {len(filtered)}")
 
+    with metrics.span("lexical_dedupe"):
+        distinct = lexical_dedupe(filtered)
+    metrics.count("articles_dropped", len(filtered) - len(distinct), stage="lexical_dedupe")
+    print(f"Lexical pre-dedupe: collapsed {len(filtered) - len(distinct)} copies, "
+          f"{len(distinct)} articles left to embed")
+
     print("Generating semantic embeddings...")
-    embedded = embed_articles(filtered)
+    with metrics.span("embed"):
+        embedded = embed_articles(distinct)
 
     print("Removing duplicates...")
-    unique = dedupe_events_ai(embedded)
+    with metrics.span("dedupe"):
+        unique = dedupe_events_ai(embedded, index=get_event_index(), new_only=new_only)
+    metrics.count("articles_dropped", len(embedded) - len(unique), stage="dedupe")
+    new_events = sum(a["is_new_event"] for a in unique)
+    print(f"Unique events: {len(unique)} ({new_events} new)")
 
-    ranked = rank_articles(unique, keyword)
+    with metrics.span("rank"):
+        ranked = rank_articles(unique, keyword, index=index)
+    metrics.count("articles_dropped", len(unique) - len(ranked), stage="rank")
     print(f"Final results: {len(ranked)}")
     return ranked
 
+def keyword_workers(keywords):
+    # Each fetch fans out to every provider on the shared fetch pool; more
+    # keywords in flight would just queue behind it against their own
+    # deadlines.
+    return max(1, min(len(keywords), FETCH_MAX_WORKERS // len(PROVIDERS)))
+
+def get_all_news_batch(keywords, new_only=False, processes=None):
+    """
+    get_all_news for many keywords at once. Fetches run concurrently; the
+    union of results is lexically deduped, embedded and event-deduped once,
+    then every surviving article is scored against every keyword in one
+    pass. Returns {keyword: ranked articles}; an article relevant to
+    several keywords appears in each list as its own copy with that
+    keyword's score.
+
+    `processes` moves the CPU-bound steps (SimHash fingerprints and BM25
+    scoring per keyword) into a pool of that many worker processes.
+    """
+    keywords = list(dict.fromkeys(keywords))
+    print(f"\nSearching for {len(keywords)} keywords\n")
+
+    with ThreadPoolExecutor(max_workers=keyword_workers(keywords),
+                            thread_name_prefix="keyword") as pool:
+        raw = [a for batch in pool.map(fetch_all, keywords) for a in batch]
+    print(f"Fetched {len(raw)} raw articles")
+
+    return rank_batch(raw, keywords, new_only, processes)
+
+def rank_batch(raw, keywords, new_only=False, processes=None, event_index=None):
+    """
+    Everything in get_all_news_batch after fetching, for any pool of raw
+    articles. `event_index` defaults to the process-wide one.
+    """
+    with metrics.span("lexical_dedupe"):
+        distinct = lexical_dedupe(raw, processes=processes)
+    metrics.count("articles_dropped", len(raw) - len(distinct), stage="lexical_dedupe")
+    with metrics.span("keyword_filter"):
+        index = InvertedIndex()
+        index.add(distinct)
+        matches = {k: set(index.match(k)) for k in keywords}
+        relevant = sorted(set().union(*matches.values()))
+    metrics.count("articles_dropped", len(distinct) - len(relevant), stage="keyword_filter")
+    print(f"Distinct articles: {len(distinct)}, relevant to some keyword: {len(relevant)}")
+
+    print("Generating semantic embeddings...")
+    with metrics.span("embed"):
+        embedded = embed_articles([distinct[doc] for doc in relevant])
+
+    print("Removing duplicates...")
+    # Not `event_index or ...`: an empty index is falsy (it has __len__)
+    if event_index is None:
+        event_index = get_event_index()
+    with metrics.span("dedupe"):
+        unique = dedupe_events_ai(embedded, index=event_index, new_only=new_only)
+    metrics.count("articles_dropped", len(embedded) - len(unique), stage="dedupe")
+    print(f"Unique events: {len(unique)}")
+
+    with metrics.span("rank"):
+        engine = ScoringEngine(unique, index=index)
+        scores = engine.scores_many(keywords, keyword_vectors(keywords), processes)
+
+    results = {}
+    for k, keyword in enumerate(keywords):
+        rows = np.array([i for i, a in enumerate(unique) if index.doc_id(a) in matches[keyword]],
+                        dtype=np.int64)
+        ranked = []
+        if len(rows):
+            column = scores[rows, k]
+            for i in engine.top_k(column).tolist():
+                ranked.append(dict(unique[rows[i]], score=float(column[i])))
+        results[keyword] = ranked
+        print(f"  {keyword}: {len(ranked)} results")
+    return results
+
 if __name__ == "__main__":
-    topic = ""
-    results = get_all_news(topic)
+    parser = argparse.ArgumentParser(description="Fetch, dedupe and rank news for one or more keywords.")
+    parser.add_argument("keywords", nargs="*", default=[""])
+    parser.add_argument("--processes", type=int, help="worker processes for CPU-bound stages (batch mode)")
+    parser.add_argument("--new-only", action="store_true")
+    parser.add_argument("--metrics-report", metavar="PATH", help="write stage timings and counters as JSON")
+    args = parser.parse_args()
+    if args.metrics_report:
+        metrics.enable()
+
+    if len(args.keywords) > 1:
+        batch = get_all_news_batch(args.keywords, new_only=args.new_only, processes=args.processes)
+        for keyword, results in batch.items():
+            for article in results:
+                article.pop("embedding", None)
+            print(f"{keyword}: " + (results[0]["title"] if results else "no results"))
+
+        filename = "resultsgen_batch.json"
+        with open(filename, "w") as f:
+            json.dump(batch, f, indent=2)
+
+        print(f"\nSaved results for {len(batch)} keywords to {filename}")
+
+    else:
+        results = get_all_news(args.keywords[0], new_only=args.new_only)
+
+        for article in results:
+            print(f"[{article['source']}] (Score: {article['score']}) {article['title']}")
+            print(f"Link: {article['link']}")
+            print("-" * 80)
 
-    for article in results:
-        print(f"[{article['source']}] (Score: {article['score']}) {article['title']}")
-        print(f"Link: {article['link']}")
-        print("-" * 80)
+        # Remove embeddings — they are NumPy arrays, not JSON-serializable
+        for article in results:
+            article.pop("embedding", None)
 
-    # Remove embeddings — they are NumPy arrays, not JSON-serializable
-    for article in results:
-        article.pop("embedding", None)
+        # Use a fixed filename
+        filename = "resultsgen.json"
 
-    # Use a fixed filename
-    filename = "resultsgen.json"
+        with open(filename, "w") as f:
+            json.dump(results, f, indent=2)
 
-    with open(filename, "w") as f:
-        json.dump(results, f, indent=2)
+        print(f"\nSaved results to {filename}")
 
-    print(f"\nSaved results to {filename}")
+    if args.metrics_report:
+        metrics.write_report(args.metrics_report)
+        print(f"Saved metrics to {args.metrics_report}")
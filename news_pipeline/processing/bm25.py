@@ -0,0 +1,130 @@
+import itertools
+import math
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from processing.lexical import tokenize
+
+# Title hits count double, as the old substring scorer weighted them higher
+FIELD_WEIGHTS = {"title": 2.0, "summary": 1.0}
+
+class InvertedIndex:
+    """
+    Incremental in-memory inverted index over article title and summary,
+    scored with BM25 (field-weighted term frequencies). Articles are
+    tokenized once when added; queries only walk the posting lists of
+    their own terms.
+    """
+
+    def __init__(self, k1=1.2, b=0.75, field_weights=None):
+        self.k1 = k1
+        self.b = b
+        self.field_weights = field_weights or FIELD_WEIGHTS
+        self.postings = {}      # term -> {doc_id: weighted tf}
+        self.articles = []
+        self._doc_len = []
+        self._total_len = 0.0
+        self._ids = {}          # id(article) -> doc_id
+
+    def __len__(self):
+        return len(self.articles)
+
+    def add(self, articles):
+        """Index a batch; returns the new doc ids."""
+        doc_ids = []
+        for a in articles:
+            doc = len(self.articles)
+            self.articles.append(a)
+            self._ids[id(a)] = doc
+
+            length = 0.0
+            for field, weight in self.field_weights.items():
+                tokens = tokenize(a.get(field) or "")
+                length += weight * len(tokens)
+                for t in tokens:
+                    posting = self.postings.setdefault(t, {})
+                    posting[doc] = posting.get(doc, 0.0) + weight
+            self._doc_len.append(length)
+            self._total_len += length
+            doc_ids.append(doc)
+        return doc_ids
+
+    def doc_id(self, article):
+        return self._ids.get(id(article))
+
+    def idf(self, term):
+        df = len(self.postings.get(term, ()))
+        n = len(self.articles)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def score(self, query):
+        """{doc_id: BM25 score} for every doc containing a query term."""
+        terms = set(tokenize(query))
+        if not terms or not self.articles:
+            return {}
+        avg_len = self._total_len / len(self.articles) or 1.0
+        k1, b = self.k1, self.b
+
+        scores = {}
+        for t in terms:
+            posting = self.postings.get(t)
+            if not posting:
+                continue
+            idf = self.idf(t)
+            for doc, tf in posting.items():
+                norm = k1 * (1 - b + b * self._doc_len[doc] / avg_len)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        return scores
+
+    def match(self, query):
+        """
+        Doc ids (ascending) containing at least half of the query's terms
+        (at least one), as whole tokens.
+        """
+        terms = set(tokenize(query))
+        needed = max(1, len(terms) // 2)
+        hits = {}
+        for t in terms:
+            for doc in self.postings.get(t, ()):
+                hits[doc] = hits.get(doc, 0) + 1
+        return sorted(doc for doc, n in hits.items() if n >= needed)
+
+    def _scores_at(self, query, doc_ids):
+        scores = self.score(query)
+        return np.array([scores.get(d, 0.0) for d in doc_ids], dtype=np.float64)
+
+    def scores_for(self, articles, query):
+        """BM25 scores aligned with `articles` (which must be indexed)."""
+        return self._scores_at(query, [self._ids[id(a)] for a in articles])
+
+    def scores_for_many(self, articles, queries, processes=None):
+        """
+        (len(articles), len(queries)) BM25 scores. With `processes`, the
+        queries are scored in a process pool that receives the index once
+        per worker.
+        """
+        doc_ids = [self._ids[id(a)] for a in articles]
+        if not processes or len(queries) < 2:
+            columns = [self._scores_at(q, doc_ids) for q in queries]
+        else:
+            with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(self,)) as pool:
+                columns = list(pool.map(_score_in_worker, queries, itertools.repeat(doc_ids)))
+        if not columns:
+            return np.zeros((len(articles), 0))
+        return np.stack(columns, axis=1)
+
+    def __getstate__(self):
+        # Workers only need postings and lengths, not the articles (and
+        # their embeddings); id()-based lookups are meaningless there anyway.
+        state = dict(self.__dict__)
+        state["articles"] = [None] * len(self.articles)
+        state["_ids"] = {}
+        return state
+
+_worker_index = None
+
+def _init_worker(index):
+    global _worker_index
+    _worker_index = index
+
+def _score_in_worker(query, doc_ids):
+    return _worker_index._scores_at(query, doc_ids)
@@ -1,38 +1,199 @@
-from sklearn.cluster import DBSCAN
+import math
 import numpy as np
-from config import DBSCAN_EPS, DBSCAN_MIN_SAMPLES
-from utils.similarity import cosine_similarity
+from config import (
+    DBSCAN_EPS, DBSCAN_MIN_SAMPLES,
+    DEDUPE_MODE, DEDUPE_LSH_RECALL, DEDUPE_LSH_BUCKET_SIZE, EMBED_COMPUTE_DTYPE
+)
+from utils.lsh import HyperplaneLSH, bucket_groups, tables_for_recall
+from utils.quantize import QuantizedMatrix, quantize
+from utils.similarity import normalize_rows
 
-def dedupe_events_ai(articles):
+# sklearn and scipy are imported where they are used: together they add
+# well over a second to `import main` and are only needed once clustering runs.
+
+# Rows per block of the similarity product. Peak extra memory is about
+# BLOCK_ROWS x N float32, e.g. 40 MB at 10k articles.
+BLOCK_ROWS = 1024
+
+def radius_graph(Xn, eps=DBSCAN_EPS, block_rows=BLOCK_ROWS):
     """
-    Cluster embeddings using DBSCAN over cosine distance.
-    Returns one exemplar per cluster.
+    Sparse matrix of cosine distances for every pair within `eps`, computed
+    as blocked matrix products over unit rows `Xn`.
     """
-    if not articles:
-        return []
+    from scipy.sparse import csr_matrix
 
-    X = np.array([a["embedding"] for a in articles])
+    n = len(Xn)
+    rows, cols, vals = [], [], []
+    for start in range(0, n, block_rows):
+        dist = 1.0 - Xn[start:start + block_rows] @ Xn.T
+        r, c = np.nonzero(dist <= eps)
+        rows.append(r + start)
+        cols.append(c)
+        # Clamp float noise on self/duplicate pairs; stored zeros still count
+        vals.append(np.maximum(dist[r, c], 0.0))
 
-    # cosine distance = 1 - cosine similarity
-    def metric(x, y):
-        return 1 - cosine_similarity(x, y)
+    return csr_matrix(
+        (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n, n)
+    )
+
+def lsh_params(n, eps=DBSCAN_EPS, recall=DEDUPE_LSH_RECALL,
+               bucket_size=DEDUPE_LSH_BUCKET_SIZE):
+    """
+    (n_bits, n_tables): enough bits for ~`bucket_size` rows per bucket, and
+    enough tables that a pair exactly at `eps` is found with prob. `recall`.
+    """
+    n_bits = min(62, max(4, int(math.log2(max(n, 1) / bucket_size))))
+    return n_bits, tables_for_recall(1 - eps, n_bits, recall)
+
+def lsh_radius_graph(Xn, eps=DBSCAN_EPS, recall=DEDUPE_LSH_RECALL,
+                     bucket_size=DEDUPE_LSH_BUCKET_SIZE, seed=0, block_rows=BLOCK_ROWS):
+    """
+    Approximate radius_graph: only pairs sharing a bucket in some LSH table
+    are compared, and each is verified exactly, so every edge is real but a
+    few pairs near `eps` may be missed.
+    """
+    from scipy.sparse import csr_matrix
+
+    n, dim = Xn.shape
+    n_bits, n_tables = lsh_params(n, eps, recall, bucket_size)
+    keys = HyperplaneLSH(dim, n_tables, n_bits, seed).signatures(Xn)
+
+    codes = []
+    for t in range(n_tables):
+        for group in bucket_groups(keys[:, t]):
+            for start in range(0, len(group), block_rows):
+                rows = group[start:start + block_rows]
+                dist = 1.0 - Xn[rows] @ Xn[group].T
+                r, c = np.nonzero(dist <= eps)
+                codes.append(rows[r].astype(np.int64) * n + group[c])
+
+    if not codes:
+        return csr_matrix((n, n), dtype=np.float32)
+    i, j = np.divmod(np.unique(np.concatenate(codes)), n)
+    dist = 1.0 - np.einsum("ij,ij->i", Xn[i], Xn[j])
+    return csr_matrix((np.maximum(dist, 0.0), (i, j)), shape=(n, n))
+
+def cluster_labels(X, mode=None):
+    """
+    DBSCAN labels for the rows of X over cosine distance.
+    `mode` is "exact" or "lsh" (defaults to DEDUPE_MODE).
+    """
+    mode = mode or DEDUPE_MODE
+    Xn = normalize_rows(X)
+    if mode == "exact":
+        graph = radius_graph(Xn)
+    elif mode == "lsh":
+        graph = lsh_radius_graph(Xn)
+    else:
+        raise ValueError(f"Unknown DEDUPE_MODE: {mode}")
+    return labels_from_graph(graph)
+
+def labels_from_graph(graph):
+    from sklearn.cluster import DBSCAN
 
     clustering = DBSCAN(
         eps=DBSCAN_EPS,
         min_samples=DBSCAN_MIN_SAMPLES,
-        metric=metric
-    ).fit(X)
+        metric="precomputed"
+    ).fit(graph)
 
-    labels = clustering.labels_
+    return clustering.labels_
 
+def _clusters(labels):
     clusters = {}
     for idx, lbl in enumerate(labels):
-        clusters.setdefault(lbl, []).append(articles[idx])
+        clusters.setdefault(lbl, []).append(idx)
+    return list(clusters.values())
+
+def _exemplars(articles, groups):
+    # pick the article with highest text length (as a heuristic proxy)
+    return [articles[max(g, key=lambda i: len(articles[i]["summary"]))] for g in groups]
 
-    exemplars = []
-    for lbl, group in clusters.items():
-        # pick the article with highest text length (as a heuristic proxy)
-        best = max(group, key=lambda a: len(a["summary"]))
-        exemplars.append(best)
+def _tag_events(exemplars, Xn, groups, index, new_only):
+    centroids = normalize_rows(np.stack([Xn[g].mean(axis=0) for g in groups]))
+    event_ids, is_new = index.assign(centroids, [len(g) for g in groups])
+    index.save()
 
+    for a, event_id, new in zip(exemplars, event_ids.tolist(), is_new.tolist()):
+        a["event_id"] = event_id
+        a["event_index"] = index.namespace
+        a["is_new_event"] = new
+
+    if new_only:
+        return [a for a in exemplars if a["is_new_event"]]
     return exemplars
+
+def dedupe_events_ai(articles, mode=None, index=None, new_only=False):
+    """
+    Cluster embeddings using DBSCAN over cosine distance.
+    Returns one exemplar per cluster.
+
+    With an EventIndex, each exemplar is tagged with the persistent
+    `event_id` of its cluster and `is_new_event`; `new_only` drops the
+    exemplars of events already seen in earlier runs.
+    """
+    if not articles:
+        return []
+
+    X = np.array([a["embedding"] for a in articles])
+    groups = _clusters(cluster_labels(X, mode))
+    exemplars = _exemplars(articles, groups)
+
+    if index is None:
+        return exemplars
+    return _tag_events(exemplars, normalize_rows(X), groups, index, new_only)
+
+class StreamingDeduper:
+    """
+    dedupe_events_ai for articles arriving in batches. Each batch is
+    clustered on its own; clusters with any article within `eps` of one
+    from an earlier batch repeat an event already emitted and are dropped,
+    the rest give one exemplar each. Unlike a single pass over everything,
+    an emitted exemplar is never swapped for a longer copy arriving later.
+
+    Earlier articles are kept as a QuantizedMatrix in `dtype`
+    (EMBED_COMPUTE_DTYPE by default), since it grows for the whole stream.
+    Each batch is clustered on its own in float32.
+    """
+
+    def __init__(self, mode=None, eps=DBSCAN_EPS, index=None, new_only=False, dtype=None):
+        self.mode = mode
+        self.eps = eps
+        self.index = index
+        self.new_only = new_only
+        self.dtype = dtype or EMBED_COMPUTE_DTYPE
+        self._seen = None   # unit rows of every article so far, grown by doubling
+        self._n = 0
+
+    def _append(self, Xn):
+        if self._seen is None:
+            self._seen = QuantizedMatrix.empty(max(64, len(Xn)), Xn.shape[1], self.dtype)
+        elif self._n + len(Xn) > len(self._seen):
+            grown = QuantizedMatrix.empty(max(2 * len(self._seen), self._n + len(Xn)),
+                                          Xn.shape[1], self.dtype)
+            grown.assign(slice(0, self._n), self._seen.take(slice(0, self._n)))
+            self._seen = grown
+        self._seen.assign(slice(self._n, self._n + len(Xn)), quantize(Xn, self.dtype))
+        self._n += len(Xn)
+
+    def add(self, articles):
+        """Exemplars of the events in `articles` not seen in earlier batches."""
+        if not articles:
+            return []
+
+        X = np.array([a["embedding"] for a in articles])
+        Xn = normalize_rows(X)
+        groups = _clusters(cluster_labels(X, self.mode))
+        if self._n:
+            repeat = np.zeros(len(Xn), dtype=bool)
+            for start in range(0, self._n, BLOCK_ROWS):
+                block = self._seen.take(slice(start, min(start + BLOCK_ROWS, self._n)))
+                repeat |= (1.0 - block.dot(Xn) <= self.eps).any(axis=0)
+            groups = [g for g in groups if not repeat[g].any()]
+        self._append(Xn)
+
+        exemplars = _exemplars(articles, groups)
+        if self.index is None or not groups:
+            return exemplars
+        return _tag_events(exemplars, Xn, groups, self.index, self.new_only)
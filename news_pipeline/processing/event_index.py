@@ -0,0 +1,206 @@
+import os
+import threading
+import time
+import uuid
+import numpy as np
+from config import (
+    DBSCAN_EPS, DEDUPE_LSH_RECALL,
+    EVENT_INDEX_PATH, EVENT_TTL_SECONDS, EVENT_INDEX_LSH_BITS
+)
+from utils.lsh import HyperplaneLSH, tables_for_recall
+
+LSH_SEED = 0
+
+# assign() drops expired events itself, at most this often, so long-lived
+# processes (the Streamlit app) keep honouring the TTL
+EXPIRE_INTERVAL_SECONDS = 60
+
+class EventIndex:
+    """
+    Persistent "seen events": one unit-length centroid per event with
+    first/last-seen timestamps. Events not seen for `ttl` seconds expire.
+    Lookups go through LSH buckets over the centroids, so matching a new
+    cluster only compares it against a handful of candidate events.
+    """
+
+    def __init__(self, path=EVENT_INDEX_PATH, ttl=EVENT_TTL_SECONDS, eps=DBSCAN_EPS,
+                 n_bits=EVENT_INDEX_LSH_BITS, recall=DEDUPE_LSH_RECALL):
+        self.path = path
+        # Event ids count from 0 in every index; this tells indexes apart
+        # (e.g. the daemon's and the app's) when their articles meet
+        self.namespace = os.path.abspath(path) if path else f"memory:{uuid.uuid4().hex}"
+        self.ttl = ttl
+        self.eps = eps
+        self.n_bits = n_bits
+        self.n_tables = tables_for_recall(1 - eps, n_bits, recall)
+        self._lock = threading.RLock()
+
+        self.ids = np.empty(0, dtype=np.int64)
+        self.centroids = None
+        self.counts = np.empty(0, dtype=np.int64)
+        self.first_seen = np.empty(0, dtype=np.float64)
+        self.last_seen = np.empty(0, dtype=np.float64)
+        self.next_id = 0
+        self._expired_at = float("-inf")
+        self._lsh = None
+        self._keys = None
+        self._buckets = []
+
+        if path and os.path.exists(path):
+            self._load()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _load(self):
+        with np.load(self.path) as f:
+            self.ids = f["ids"]
+            self.centroids = f["centroids"]
+            self.counts = f["counts"]
+            self.first_seen = f["first_seen"]
+            self.last_seen = f["last_seen"]
+            self.next_id = int(f["next_id"])
+        self._rebuild()
+
+    def save(self):
+        if not self.path or self.centroids is None:
+            return
+        with self._lock:
+            tmp = self.path + ".tmp.npz"
+            np.savez(
+                tmp,
+                ids=self.ids,
+                centroids=self.centroids,
+                counts=self.counts,
+                first_seen=self.first_seen,
+                last_seen=self.last_seen,
+                next_id=np.int64(self.next_id)
+            )
+            os.replace(tmp, self.path)
+
+    def _rebuild(self):
+        dim = self.centroids.shape[1]
+        self._lsh = HyperplaneLSH(dim, self.n_tables, self.n_bits, LSH_SEED)
+        self._keys = self._lsh.signatures(self.centroids)
+        self._buckets = [{} for _ in range(self.n_tables)]
+        for row, keys in enumerate(self._keys.tolist()):
+            self._bucket_add(row, keys)
+
+    def _bucket_add(self, row, keys):
+        for table, key in zip(self._buckets, keys):
+            table.setdefault(key, []).append(row)
+
+    def _bucket_remove(self, row, keys):
+        for table, key in zip(self._buckets, keys):
+            rows = table[key]
+            rows.remove(row)
+            if not rows:
+                del table[key]
+
+    def expire(self, now=None):
+        """Drop events last seen more than `ttl` seconds ago."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expired_at = now
+            if self.centroids is None:
+                return 0
+            keep = self.last_seen >= now - self.ttl
+            dropped = int((~keep).sum())
+            if dropped:
+                self.ids = self.ids[keep]
+                self.centroids = self.centroids[keep]
+                self.counts = self.counts[keep]
+                self.first_seen = self.first_seen[keep]
+                self.last_seen = self.last_seen[keep]
+                self._rebuild()
+            return dropped
+
+    def assign(self, centroids, sizes=None, now=None):
+        """
+        Match unit-length cluster centroids to known events, folding each
+        match into the event's running centroid and registering the rest
+        as new events. Expired events are dropped first (at most every
+        EXPIRE_INTERVAL_SECONDS). Returns (event_ids, is_new) arrays.
+        """
+        centroids = np.asarray(centroids, dtype=np.float32)
+        sizes = np.ones(len(centroids), dtype=np.int64) if sizes is None else np.asarray(sizes)
+        now = time.time() if now is None else now
+        event_ids = np.empty(len(centroids), dtype=np.int64)
+        is_new = np.zeros(len(centroids), dtype=bool)
+
+        with self._lock:
+            if now - self._expired_at >= EXPIRE_INTERVAL_SECONDS:
+                self.expire(now)
+            if self.centroids is None:
+                self.centroids = np.empty((0, centroids.shape[1]), dtype=np.float32)
+                self._rebuild()
+
+            keys = self._lsh.signatures(centroids)
+            new = []
+            for k, (vec, size) in enumerate(zip(centroids, sizes)):
+                row = self._match(vec, keys[k].tolist())
+                if row is None:
+                    new.append(k)
+                else:
+                    self._update(row, vec, int(size), now)
+                    event_ids[k] = self.ids[row]
+
+            # Clusters within one batch are already distinct, so new events
+            # are appended in one go rather than matched against each other.
+            if new:
+                start = len(self.ids)
+                event_ids[new] = np.arange(self.next_id, self.next_id + len(new))
+                is_new[new] = True
+                self.ids = np.concatenate([self.ids, event_ids[new]])
+                self.centroids = np.vstack([self.centroids, centroids[new]])
+                self.counts = np.concatenate([self.counts, sizes[new].astype(np.int64)])
+                self.first_seen = np.concatenate([self.first_seen, np.full(len(new), now)])
+                self.last_seen = np.concatenate([self.last_seen, np.full(len(new), now)])
+                self._keys = np.vstack([self._keys, keys[new]])
+                for offset, k in enumerate(new):
+                    self._bucket_add(start + offset, keys[k].tolist())
+                self.next_id += len(new)
+
+        return event_ids, is_new
+
+    def _match(self, vec, keys):
+        candidates = set()
+        for table, key in zip(self._buckets, keys):
+            candidates.update(table.get(key, ()))
+        if not candidates:
+            return None
+        rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        sims = self.centroids[rows] @ vec
+        best = int(np.argmax(sims))
+        if 1.0 - sims[best] > self.eps:
+            return None
+        return int(rows[best])
+
+    def _update(self, row, vec, size, now):
+        merged = self.centroids[row] * self.counts[row] + vec * size
+        norm = np.linalg.norm(merged)
+        if norm:
+            merged /= norm
+        self.centroids[row] = merged
+        self.counts[row] += size
+        self.last_seen[row] = now
+
+        # The centroid may have drifted into other buckets
+        new_keys = self._lsh.signatures(merged[None, :])[0]
+        if not np.array_equal(new_keys, self._keys[row]):
+            self._bucket_remove(row, self._keys[row].tolist())
+            self._bucket_add(row, new_keys.tolist())
+            self._keys[row] = new_keys
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_event_index():
+    """Process-wide index, loaded on first use with expired events dropped (and
+    dropped again by assign() as it runs)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = EventIndex()
+            _index.expire()
+        return _index
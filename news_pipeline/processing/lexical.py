@@ -0,0 +1,184 @@
+import hashlib
+import re
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "cmpid", "ncid", "ocid", "sr_share", "smid", "from"
+}
+TRACKING_PREFIXES = ("utm_",)
+AMP_PARAMS = {"amp", "outputtype", "amp_js_v", "usqp"}
+
+# Title + summary snippets are short, so SimHashes of near-copies differ by
+# more bits than on full documents (~6 vs ~25-30 for unrelated stories).
+SIMHASH_BITS = 64
+SIMHASH_MAX_DISTANCE = 7
+SIMHASH_BANDS = SIMHASH_MAX_DISTANCE + 1  # pigeonhole: close pairs share a band
+SHINGLE_SIZE = 2
+MIN_TITLE_TOKENS = 5       # shorter titles are too generic to match on alone
+
+def canonical_url(url):
+    """
+    Normalize a link so syndicated / AMP / tracked copies compare equal.
+    Returns None for missing links.
+    """
+    if not url or url == "#":
+        return None
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    path = parts.path
+
+    # Google AMP cache: <mangled>.cdn.ampproject.org/c/s/<host>/<path>
+    if host.endswith(".cdn.ampproject.org"):
+        segments = path.split("/")
+        if len(segments) > 3 and segments[1] in ("c", "v"):
+            rest = segments[3:] if segments[2] == "s" else segments[2:]
+            host, path = rest[0].lower(), "/" + "/".join(rest[1:])
+
+    for prefix in ("www.", "amp.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+
+    segments = [s for s in path.split("/") if s and s.lower() != "amp"]
+    path = "/" + "/".join(segments)
+    for suffix in (".amp", ".amp.html"):
+        if path.endswith(suffix):
+            path = path[:-len(suffix)]
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS
+        and k.lower() not in AMP_PARAMS
+        and not k.lower().startswith(TRACKING_PREFIXES)
+    )
+    return host + path.rstrip("/") + ("?" + urlencode(query) if query else "")
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+def simhash(tokens, k=SHINGLE_SIZE):
+    """64-bit SimHash over word k-shingles (single words for short texts)."""
+    if len(tokens) >= k:
+        shingles = [" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)]
+    else:
+        shingles = tokens
+    if not shingles:
+        return 0
+
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little")
+         for s in shingles],
+        dtype=np.uint64
+    )
+    bits = (hashes[:, None] >> np.arange(SIMHASH_BITS, dtype=np.uint64)) & np.uint64(1)
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return int(np.sum(np.left_shift(np.uint64(1), np.flatnonzero(majority).astype(np.uint64)),
+                      dtype=np.uint64))
+
+def fingerprint(article):
+    """SimHash of an article's title + summary tokens."""
+    return simhash(tokenize(article["title"]) + tokenize(article["summary"]))
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+class LexicalIndex:
+    """
+    Incremental form of lexical_dedupe: articles are added one at a time
+    and grouped with earlier copies (same canonical URL, same normalized
+    title, or SimHashes within SIMHASH_MAX_DISTANCE bits).
+    """
+
+    def __init__(self):
+        self.articles = []
+        self._parent = []
+        self._seen_url = {}
+        self._seen_title = {}
+        self._bands = [{} for _ in range(SIMHASH_BANDS)]
+        self._fingerprints = []
+        self._band_bits = SIMHASH_BITS // SIMHASH_BANDS
+        self._band_mask = (1 << self._band_bits) - 1
+
+    def __len__(self):
+        return len(self.articles)
+
+    def _union(self, i, j):
+        ri, rj = _find(self._parent, i), _find(self._parent, j)
+        if ri != rj:
+            self._parent[max(ri, rj)] = min(ri, rj)
+
+    def add(self, article, fp=None):
+        """
+        Index `article`; True if it copies an article added earlier.
+        `fp` is its fingerprint() if already computed.
+        """
+        i = len(self.articles)
+        self.articles.append(article)
+        self._parent.append(i)
+
+        url = canonical_url(article.get("link"))
+        if url:
+            if url in self._seen_url:
+                self._union(i, self._seen_url[url])
+            else:
+                self._seen_url[url] = i
+
+        title_tokens = tokenize(article["title"])
+        if len(title_tokens) >= MIN_TITLE_TOKENS:
+            title = " ".join(title_tokens)
+            if title in self._seen_title:
+                self._union(i, self._seen_title[title])
+            else:
+                self._seen_title[title] = i
+
+        if fp is None:
+            fp = simhash(title_tokens + tokenize(article["summary"]))
+        self._fingerprints.append(fp)
+        candidates = set()
+        for b, table in enumerate(self._bands):
+            key = (fp >> (b * self._band_bits)) & self._band_mask
+            candidates.update(table.get(key, ()))
+            table.setdefault(key, []).append(i)
+        for j in candidates:
+            if bin(fp ^ self._fingerprints[j]).count("1") <= SIMHASH_MAX_DISTANCE:
+                self._union(i, j)
+
+        # Unions always point at the lower index, so any match moves i's root
+        return _find(self._parent, i) != i
+
+    def groups(self):
+        """Indices of each group of copies, in first-seen order."""
+        groups = {}
+        for i in range(len(self.articles)):
+            groups.setdefault(_find(self._parent, i), []).append(i)
+        return list(groups.values())
+
+def lexical_dedupe(articles, processes=None):
+    """
+    Collapse obvious copies before embedding: same canonical URL, same
+    normalized title, or title+summary SimHashes within
+    SIMHASH_MAX_DISTANCE bits. Keeps the longest summary of each group,
+    in first-seen order. With `processes`, fingerprints (the costly part)
+    are computed in a process pool.
+    """
+    fps = [None] * len(articles)
+    if processes and len(articles) > 1:
+        with ProcessPoolExecutor(processes) as pool:
+            fps = list(pool.map(fingerprint, articles,
+                                chunksize=max(1, len(articles) // (4 * processes))))
+
+    index = LexicalIndex()
+    for a, fp in zip(articles, fps):
+        index.add(a, fp)
+
+    return [
+        articles[max(group, key=lambda i: len(articles[i]["summary"]))]
+        for group in index.groups()
+    ]
@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+
 def normalize_article(title, link, source, summary, date, image=None):
     return {
         "title": title or "No Headline",
@@ -7,3 +9,19 @@ def normalize_article(title, link, source, summary, date, image=None):
         "published_at": date or "",
         "image": image or "https://via.placeholder.com/150"
     }
+
+def parse_published(value):
+    """
+    `published_at` as an aware UTC datetime, or None if missing/unparseable.
+    Handles NewsAPI/GNews ("2024-05-01T09:30:00Z") and NewsData
+    ("2024-05-01 09:30:00", UTC) formats.
+    """
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
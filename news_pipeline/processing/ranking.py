@@ -1,43 +1,52 @@
-from embeddings.embedder import embed_text
-from utils.similarity import cosine_similarity
-
-def relevance_score_keyword(article, keyword):
-    title = article["title"].lower()
-    summary = article["summary"].lower()
-    words = keyword.lower().split()
-
-    score = 0
-    if keyword.lower() in title: score += 10
-    if keyword.lower() in summary: score += 5
-
-    for w in words:
-        if w in title: score += 3
-        elif w in summary: score += 1
-
-    return score
+import numpy as np
+from embeddings.embedder import embed_text, embed_texts
+from processing.lexical import tokenize
+from processing.scoring import ScoringEngine
 
 def keyword_match(article, keyword):
-    content = (article["title"] + " " + article["summary"]).lower()
-    words = keyword.lower().split()
+    """
+    Per-article form of InvertedIndex.match: at least half of the keyword's
+    terms (min. one) must appear as whole tokens.
+    """
+    content = set(tokenize(article["title"] + " " + article["summary"]))
+    words = set(tokenize(keyword))
     matches = sum(w in content for w in words)
     return matches >= max(1, len(words) // 2)
 
 # Cache keyword embeddings
 _keyword_embeds = {}
 
-def rank_articles(articles, keyword):
+def keyword_vector(keyword):
     # Embed keyword only once
     if keyword not in _keyword_embeds:
         _keyword_embeds[keyword] = embed_text(keyword)
-    kw_vec = _keyword_embeds[keyword]
+    return _keyword_embeds[keyword]
+
+def keyword_vectors(keywords):
+    """(len(keywords), dim) matrix; uncached keywords are embedded in one batch."""
+    missing = [k for k in dict.fromkeys(keywords) if k not in _keyword_embeds]
+    if missing:
+        _keyword_embeds.update(zip(missing, embed_texts(missing)))
+    return np.stack([_keyword_embeds[k] for k in keywords])
+
+def rank_articles(articles, keyword, kw_vec=None, top_k=None, engine=None, index=None):
+    """
+    Score articles in place (`score` key) and return them best first,
+    optionally only the best `top_k`. Pass a ScoringEngine built over the
+    same articles to reuse its precomputed index and embedding matrix, or
+    the InvertedIndex the articles were filtered with.
+    """
+    if not articles:
+        return []
+
+    if kw_vec is None:
+        kw_vec = keyword_vector(keyword)
+
+    engine = engine or ScoringEngine(articles, index=index)
+    scores = engine.scores(keyword, kw_vec)
 
     ranked = []
-    for a in articles:
-        kw_score = relevance_score_keyword(a, keyword)
-        sem_score = cosine_similarity(a["embedding"], kw_vec) * 100
-
-        final = kw_score * 0.6 + sem_score * 0.4
-
-        ranked.append({**a, "score": final})
-
-    return sorted(ranked, key=lambda x: x["score"], reverse=True)
+    for i in engine.top_k(scores, top_k).tolist():
+        articles[i]["score"] = float(scores[i])
+        ranked.append(articles[i])
+    return ranked
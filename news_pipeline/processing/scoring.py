@@ -0,0 +1,73 @@
+import numpy as np
+from config import RANK_WEIGHTS, EMBED_COMPUTE_DTYPE
+from utils.quantize import quantize
+from utils.similarity import normalize_rows
+from processing.bm25 import InvertedIndex
+
+class ScoringEngine:
+    """
+    Scores one batch of articles against any number of keywords. Articles
+    are tokenized into a BM25 index and embeddings are stacked and
+    normalized once up front, so each keyword costs one matrix-vector
+    product plus a walk over its terms' posting lists.
+
+    `index` may be a larger InvertedIndex the articles were already added
+    to (e.g. the one used for filtering); otherwise one is built here. The
+    normalized embeddings are kept as a QuantizedMatrix in `dtype`
+    (EMBED_COMPUTE_DTYPE by default).
+    """
+
+    def __init__(self, articles, weights=None, index=None, dtype=None):
+        self.articles = articles
+        self.weights = weights or RANK_WEIGHTS
+        if index is None:
+            index = InvertedIndex()
+            index.add(articles)
+        self.index = index
+        self._unit = None
+        if articles:
+            self._unit = quantize(normalize_rows(np.stack([a["embedding"] for a in articles])),
+                                  dtype or EMBED_COMPUTE_DTYPE)
+
+    def __len__(self):
+        return len(self.articles)
+
+    def keyword_scores(self, keyword):
+        """BM25 relevance of each article to `keyword`."""
+        return self.index.scores_for(self.articles, keyword)
+
+    def semantic_scores(self, kw_vec):
+        """Cosine similarity to `kw_vec`, x 100."""
+        if self._unit is None:
+            return np.zeros(0)
+        kw_unit = normalize_rows(np.asarray(kw_vec)[None, :])[0]
+        return self._unit.dot(kw_unit).astype(np.float64) * 100
+
+    def scores(self, keyword, kw_vec):
+        return (self.keyword_scores(keyword) * self.weights["keyword"]
+                + self.semantic_scores(kw_vec) * self.weights["semantic"])
+
+    def scores_many(self, keywords, kw_matrix, processes=None):
+        """
+        (n_articles, n_keywords) scores: one matrix product for the semantic
+        part, BM25 per keyword (in `processes` worker processes if given).
+        """
+        lexical = self.index.scores_for_many(self.articles, keywords, processes)
+        if self._unit is None:
+            return lexical
+        semantic = self._unit.dot(normalize_rows(np.asarray(kw_matrix))).astype(np.float64) * 100
+        return lexical * self.weights["keyword"] + semantic * self.weights["semantic"]
+
+    @staticmethod
+    def top_k(scores, k=None):
+        """
+        Indices of the `k` best scores, best first; ties keep input order.
+        Only the top `k` are fully sorted.
+        """
+        n = len(scores)
+        if k is None or k >= n:
+            return np.argsort(-scores, kind="stable")
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.lexsort((top, -scores[top]))]
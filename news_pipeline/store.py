@@ -0,0 +1,107 @@
+import json
+import sqlite3
+import threading
+import time
+
+class ResultsStore:
+    """
+    Durable per-topic results written by the polling daemon: ranked
+    articles (without embeddings) plus each provider's high-water mark, so
+    the next cycle only asks for newer articles. Readers (the app) only
+    ever see whole cycles: articles and marks are committed together.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS articles (
+                topic TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                event_id INTEGER,
+                score REAL NOT NULL,
+                published_at TEXT,
+                fetched_at REAL NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (topic, hash)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                topic TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                published_at TEXT NOT NULL,
+                PRIMARY KEY (topic, provider)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS topics (
+                topic TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    def watermarks(self, topic):
+        """{provider: ISO published_at of the newest article seen}."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT provider, published_at FROM watermarks WHERE topic = ?", (topic,)
+            )
+            return dict(cur.fetchall())
+
+    def commit_cycle(self, results, marks, now=None):
+        """
+        Append one cycle: `results` maps topics to ranked articles, `marks`
+        maps topics to {provider: ISO published_at}. Articles already
+        stored for a topic are left as they are.
+        """
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            for topic, articles in results.items():
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (topic, a["_hash"], a.get("event_id"), a["score"], a.get("published_at"),
+                         now, json.dumps({k: v for k, v in a.items() if k != "embedding"}))
+                        for a in articles
+                    ]
+                )
+            for topic, provider_marks in marks.items():
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)",
+                    [(topic, p, m) for p, m in provider_marks.items()]
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO topics VALUES (?, ?)",
+                [(topic, now) for topic in set(results) | set(marks)]
+            )
+
+    def updated_at(self, topic):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at FROM topics WHERE topic = ?", (topic,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def latest(self, topic, limit=50, since=None):
+        """
+        Stored articles for `topic`, newest cycle first and best score
+        first within it; only those fetched after `since` if given.
+        """
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT data FROM articles WHERE topic = ? AND fetched_at >= ? "
+                "ORDER BY fetched_at DESC, score DESC LIMIT ?",
+                (topic, since or 0.0, limit)
+            )
+            return [json.loads(row[0]) for row in cur.fetchall()]
+
+    def topics(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT topic, updated_at FROM topics").fetchall())
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,167 @@
+"""
+Streaming form of get_all_news: articles flow through keyword filter,
+lexical dedupe, embedding (in micro-batches), incremental semantic dedupe
+and scoring as providers answer, instead of stage by stage.
+
+Stages run on their own threads joined by bounded queues, so a slow
+consumer (e.g. flashcard generation) holds back the stages before it
+rather than letting them pile up work.
+"""
+import queue
+import threading
+import time
+from config import STREAM_BATCH_SIZE, STREAM_MAX_WAIT, STREAM_QUEUE_SIZE
+from fetchers.parallel import iter_fetch
+from processing.bm25 import InvertedIndex
+from processing.dedupe import StreamingDeduper
+from processing.event_index import get_event_index
+from processing.lexical import LexicalIndex
+from processing.ranking import keyword_match, keyword_vector
+from processing.scoring import ScoringEngine
+from embeddings.embedder import embed_articles
+from utils import metrics
+
+_DONE = object()
+
+class _Failed:
+    def __init__(self, error):
+        self.error = error
+
+class Stage:
+    """
+    Runs the iterator `source` on a daemon thread, buffering at most
+    `maxsize` items. Iterating (or get()) re-raises the source's exception;
+    close() makes the thread stop at its next item.
+    """
+
+    def __init__(self, source, maxsize=STREAM_QUEUE_SIZE, name="stage"):
+        self._queue = queue.Queue(maxsize)
+        self._stop = threading.Event()
+        self._finished = False
+        threading.Thread(target=self._run, args=(source,), name=name, daemon=True).start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self, source):
+        try:
+            for item in source:
+                if not self._put(item):
+                    return
+        except Exception as e:
+            self._put(_Failed(e))
+            return
+        self._put(_DONE)
+
+    def get(self, timeout=None):
+        """
+        Next item; raises queue.Empty on timeout and StopIteration once the
+        source is exhausted.
+        """
+        if self._finished:
+            raise StopIteration
+        item = self._queue.get(timeout=timeout)
+        if item is _DONE:
+            self._finished = True
+            raise StopIteration
+        if isinstance(item, _Failed):
+            self._finished = True
+            raise item.error
+        return item
+
+    def __iter__(self):
+        try:
+            while True:
+                try:
+                    yield self.get()
+                except StopIteration:
+                    return
+        finally:
+            self.close()
+
+    def close(self):
+        self._stop.set()
+
+def micro_batches(stage, size=STREAM_BATCH_SIZE, max_wait=STREAM_MAX_WAIT):
+    """
+    Lists of up to `size` items from `stage`; a partial batch is released
+    `max_wait` seconds after its first item arrived.
+    """
+    while True:
+        try:
+            batch = [stage.get()]
+        except StopIteration:
+            return
+        deadline = time.monotonic() + max_wait
+        while len(batch) < size:
+            try:
+                batch.append(stage.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+            except StopIteration:
+                yield batch
+                return
+        yield batch
+
+def _distinct_matches(keyword, fetch):
+    """Fetched articles that match `keyword` and are not lexical copies."""
+    lexical = LexicalIndex()
+    for _, articles in fetch(keyword):
+        with metrics.span("keyword_filter"):
+            matched = [a for a in articles if keyword_match(a, keyword)]
+        metrics.count("articles_dropped", len(articles) - len(matched), stage="keyword_filter")
+        with metrics.span("lexical_dedupe"):
+            distinct = [a for a in matched if not lexical.add(a)]
+        metrics.count("articles_dropped", len(matched) - len(distinct), stage="lexical_dedupe")
+        yield from distinct
+
+def _unique_scored(keyword, articles, batch_size, max_wait, new_only):
+    deduper = StreamingDeduper(index=get_event_index(), new_only=new_only)
+    index = InvertedIndex()
+    kw_vec = None
+
+    for batch in micro_batches(articles, batch_size, max_wait):
+        with metrics.span("embed"):
+            embedded = embed_articles(batch)
+        with metrics.span("dedupe"):
+            unique = deduper.add(embedded)
+        metrics.count("articles_dropped", len(embedded) - len(unique), stage="dedupe")
+        if not unique:
+            continue
+
+        with metrics.span("rank"):
+            if kw_vec is None:
+                kw_vec = keyword_vector(keyword)
+            # BM25 statistics cover every article emitted so far, so early
+            # scores are computed against a smaller corpus than later ones
+            index.add(unique)
+            engine = ScoringEngine(unique, index=index)
+            scores = engine.scores(keyword, kw_vec)
+            order = engine.top_k(scores).tolist()
+        for i in order:
+            unique[i]["score"] = float(scores[i])
+            yield unique[i]
+
+def stream_news(keyword, new_only=False, batch_size=STREAM_BATCH_SIZE,
+                max_wait=STREAM_MAX_WAIT, fetch=iter_fetch):
+    """
+    Yield unique, scored articles for `keyword` as soon as each is ready,
+    best first within each micro-batch. Stops early (and stops its
+    threads) when the consumer closes the generator.
+    """
+    distinct = Stage(_distinct_matches(keyword, fetch), name="stream-filter")
+    scored = Stage(
+        _unique_scored(keyword, distinct, batch_size, max_wait, new_only),
+        name="stream-embed"
+    )
+    try:
+        yield from scored
+    finally:
+        distinct.close()
+        scored.close()
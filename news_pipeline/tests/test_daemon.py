@@ -0,0 +1,51 @@
+import numpy as np
+import daemon
+import main
+from processing.event_index import EventIndex
+from store import ResultsStore
+
+DIM = 8
+
+ARTICLES = [
+    {"title": "Green hydrogen plant opens", "summary": "A green hydrogen plant opened in Gujarat.",
+     "published_at": "2026-10-01T08:00:00Z", "source": "Wire A", "link": "https://a.example/1"},
+    {"title": "Green hydrogen subsidy cut", "summary": "The green hydrogen subsidy is being cut back.",
+     "published_at": "2026-10-01T09:00:00Z", "source": "Wire B", "link": "https://b.example/2"},
+]
+
+def fake_embed(articles, batch_size=16):
+    # One orthogonal direction per article: every article is its own event
+    for i, a in enumerate(articles):
+        vec = np.zeros(DIM, dtype=np.float32)
+        vec[i % DIM] = 1.0
+        a["_hash"] = a["link"]
+        a["embedding"] = vec
+    return articles
+
+def test_cycle_writes_its_own_event_index(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(daemon, "iter_fetch",
+                        lambda topic, since=None: iter([("newsdata", [dict(a) for a in ARTICLES])]))
+    monkeypatch.setattr(main, "embed_articles", fake_embed)
+    monkeypatch.setattr(main, "keyword_vectors",
+                        lambda keywords: np.ones((len(keywords), DIM), dtype=np.float32))
+
+    def shared_index():
+        raise AssertionError("daemon cycle used the process-wide event index")
+    monkeypatch.setattr(main, "get_event_index", shared_index)
+
+    path = tmp_path / "daemon_event_index.npz"
+    index = EventIndex(path=str(path))
+    assert len(index) == 0
+
+    store = ResultsStore(str(tmp_path / "results.db"))
+    try:
+        counts = daemon.run_cycle(["green hydrogen"], store, index)
+    finally:
+        store.close()
+
+    assert counts == {"green hydrogen": 2}
+    assert len(index) == 2
+    assert path.exists()
+    assert len(EventIndex(path=str(path))) == 2
+    assert not (tmp_path / "event_index.npz").exists()
@@ -0,0 +1,53 @@
+import math
+import numpy as np
+
+class HyperplaneLSH:
+    """
+    Random-hyperplane LSH for cosine similarity: each of `n_tables` tables
+    hashes a unit vector to the sign pattern of `n_bits` random projections.
+    """
+
+    def __init__(self, dim, n_tables, n_bits, seed=0):
+        if not 1 <= n_bits <= 62:
+            raise ValueError("n_bits must be between 1 and 62")
+        rng = np.random.default_rng(seed)
+        self.dim = dim
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self._planes = rng.standard_normal((dim, n_tables * n_bits)).astype(np.float32)
+        self._weights = np.left_shift(np.int64(1), np.arange(n_bits, dtype=np.int64))
+
+    def signatures(self, X):
+        """(n, n_tables) int64 bucket keys for the rows of X."""
+        bits = (np.asarray(X, dtype=np.float32) @ self._planes) > 0
+        return bits.reshape(len(bits), self.n_tables, self.n_bits) @ self._weights
+
+def collision_probability(cos_sim, n_bits):
+    """Chance two vectors at `cos_sim` share a bucket in one table."""
+    theta = math.acos(max(-1.0, min(1.0, cos_sim)))
+    return (1 - theta / math.pi) ** n_bits
+
+def tables_for_recall(cos_sim, n_bits, recall):
+    """
+    Tables needed so a pair at `cos_sim` collides in at least one table
+    with probability >= `recall`.
+    """
+    p = collision_probability(cos_sim, n_bits)
+    if p >= 1:
+        return 1
+    if recall >= 1:
+        raise ValueError("recall must be < 1")
+    return max(1, math.ceil(math.log(1 - recall) / math.log(1 - p)))
+
+def bucket_groups(keys):
+    """
+    Yields index arrays of rows sharing a key, for buckets of 2 or more.
+    """
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    bounds = np.flatnonzero(np.diff(sorted_keys)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(keys)]))
+    for s, e in zip(starts, ends):
+        if e - s > 1:
+            yield order[s:e]
@@ -0,0 +1,194 @@
+"""
+Stage timings and counters for a pipeline run, exported as a JSON report
+or in Prometheus text format.
+
+    from utils import metrics
+
+    with metrics.span("dedupe"):
+        ...
+    metrics.count("articles_dropped", n, stage="dedupe")
+
+Off unless FLASHNEWS_METRICS=1 (or enable() is called): span() then
+returns one shared no-op context manager and count() returns straight
+away, so instrumented code pays a function call and a flag check.
+
+FLASHNEWS_METRICS_REPORT=<path> writes the JSON report at exit, and
+FLASHNEWS_METRICS_PORT=<port> serves /metrics on 127.0.0.1. Both imply
+FLASHNEWS_METRICS=1.
+
+Standard library only, and read from the environment rather than config,
+because the flashcard pipeline imports it too (it must be the same module
+object for one process-wide registry: import it as `utils.metrics` when
+news_pipeline/ is on sys.path).
+"""
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from contextlib import nullcontext
+
+REPORT_PATH = os.getenv("FLASHNEWS_METRICS_REPORT")
+PORT = int(os.getenv("FLASHNEWS_METRICS_PORT", "0"))
+ENABLED = os.getenv("FLASHNEWS_METRICS") == "1" or bool(REPORT_PATH) or bool(PORT)
+
+PREFIX = "flashnews"
+
+_NOOP = nullcontext()
+_lock = threading.Lock()
+_spans = {}     # (name, labels) -> [count, total seconds, max seconds]
+_counters = {}  # (name, labels) -> value
+_started = time.time()
+_server = None
+
+def enabled():
+    return ENABLED
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+def reset():
+    global _started
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _started = time.time()
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+class _Span:
+    __slots__ = ("key", "start")
+
+    def __init__(self, key):
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _observe(self.key, time.perf_counter() - self.start)
+        return False
+
+def span(name, **labels):
+    """Context manager timing the block under `name` and `labels`."""
+    if not ENABLED:
+        return _NOOP
+    return _Span(_key(name, labels))
+
+def _observe(key, seconds):
+    with _lock:
+        s = _spans.get(key)
+        if s is None:
+            _spans[key] = [1, seconds, seconds]
+        else:
+            s[0] += 1
+            s[1] += seconds
+            s[2] = max(s[2], seconds)
+
+def count(name, value=1, **labels):
+    """Add `value` to the counter `name` with `labels`."""
+    if not ENABLED or not value:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def report():
+    """Everything recorded since start (or reset()), JSON-ready."""
+    with _lock:
+        spans = [
+            {"name": name, "labels": dict(labels), "count": s[0],
+             "total_seconds": s[1], "max_seconds": s[2]}
+            for (name, labels), s in sorted(_spans.items())
+        ]
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+        started = _started
+    return {"started_at": started, "duration_seconds": time.time() - started,
+            "spans": spans, "counters": counters}
+
+def write_report(path):
+    with open(path, "w") as f:
+        json.dump(report(), f, indent=2)
+
+def _metric_name(name):
+    return f"{PREFIX}_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels.items()
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+def prometheus_text():
+    """report() in the Prometheus text exposition format."""
+    data = report()
+    lines = [f"# TYPE {PREFIX}_span_seconds summary"]
+    for s in data["spans"]:
+        labels = _label_text(dict(s["labels"], span=s["name"]))
+        lines.append(f"{PREFIX}_span_seconds_sum{labels} {s['total_seconds']}")
+        lines.append(f"{PREFIX}_span_seconds_count{labels} {s['count']}")
+    lines.append(f"# TYPE {PREFIX}_span_seconds_max gauge")
+    for s in data["spans"]:
+        labels = _label_text(dict(s["labels"], span=s["name"]))
+        lines.append(f"{PREFIX}_span_seconds_max{labels} {s['max_seconds']}")
+
+    typed = set()
+    for c in data["counters"]:
+        name = _metric_name(c["name"]) + "_total"
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_label_text(c['labels'])} {c['value']}")
+    return "\n".join(lines) + "\n"
+
+def _server_for(host, port):
+    # Only processes serving /metrics pay for importing http.server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+def serve(port, host="127.0.0.1"):
+    """Serve /metrics on a daemon thread (once per process); enables metrics."""
+    global _server
+    enable()
+    with _lock:
+        if _server is None:
+            _server = _server_for(host, port)
+            threading.Thread(target=_server.serve_forever, name="metrics",
+                             daemon=True).start()
+    return _server
+
+if PORT:
+    serve(PORT)
+if REPORT_PATH:
+    atexit.register(write_report, REPORT_PATH)
@@ -0,0 +1,92 @@
+import numpy as np
+
+DTYPES = ("float32", "float16", "int8")
+
+# Rows upcast at a time by QuantizedMatrix.dot
+BLOCK_ROWS = 4096
+
+class QuantizedMatrix:
+    """
+    Row-major embedding matrix stored as float32, float16, or int8 with one
+    float32 scale per row (vector ~= data[i] * scales[i]).
+    """
+
+    def __init__(self, data, scales=None):
+        self.data = data
+        self.scales = scales
+
+    @classmethod
+    def empty(cls, n, dim, dtype):
+        dtype = np.dtype(dtype)
+        scales = np.empty(n, dtype=np.float32) if dtype == np.int8 else None
+        return cls(np.empty((n, dim), dtype=dtype), scales)
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self):
+        return len(self.data)
+
+    def take(self, idx):
+        return QuantizedMatrix(
+            self.data[idx],
+            self.scales[idx] if self.scales is not None else None
+        )
+
+    def assign(self, idx, other):
+        self.data[idx] = other.data
+        if self.scales is not None:
+            self.scales[idx] = other.scales
+
+    def to_float32(self):
+        if self.scales is not None:
+            return self.data.astype(np.float32) * self.scales[:, None]
+        return self.data.astype(np.float32, copy=False)
+
+    def dot(self, other):
+        """
+        Every row dotted with the rows of float32 `other` (or with a single
+        vector), as float32. Stored rows are upcast BLOCK_ROWS at a time, so
+        the full matrix never exists in float32.
+        """
+        other = np.asarray(other, dtype=np.float32)
+        if self.dtype == np.float32:
+            return self.data @ other.T
+        out = np.empty((len(self.data),) + other.shape[:-1], dtype=np.float32)
+        for start in range(0, len(self.data), BLOCK_ROWS):
+            block = self.data[start:start + BLOCK_ROWS].astype(np.float32)
+            out[start:start + len(block)] = block @ other.T
+        if self.scales is not None:
+            out *= self.scales.reshape((-1,) + (1,) * (out.ndim - 1))
+        return out
+
+def _quantize_rows(matrix):
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    data = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return data, scales.astype(np.float32)
+
+def quantize(matrix, dtype):
+    """
+    float32 matrix -> QuantizedMatrix in `dtype` (one of DTYPES).
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    dtype = np.dtype(dtype)
+    if dtype == np.float32:
+        return QuantizedMatrix(matrix)
+    if dtype == np.float16:
+        return QuantizedMatrix(matrix.astype(np.float16))
+    if dtype == np.int8:
+        return QuantizedMatrix(*_quantize_rows(matrix))
+    raise ValueError(f"Unsupported embedding dtype: {dtype}")
@@ -5,3 +5,12 @@ def cosine_similarity(a, b):
     if denom == 0:
         return 0.0
     return float(np.dot(a, b) / denom)
+
+def normalize_rows(X):
+    """
+    L2-normalize rows once so cosine similarity is a plain dot product.
+    Zero rows stay zero (similarity 0, distance 1, as before).
+    """
+    X = np.asarray(X, dtype=np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return np.divide(X, norms, out=np.zeros_like(X), where=norms != 0)
@@ -0,0 +1,116 @@
+"""
+Programmatic entry point: news search straight into flashcard generation,
+with articles handed over in memory.
+
+    from pipeline import run_pipeline, stream_pipeline
+    articles, flashcards = run_pipeline("green hydrogen")
+
+    for article, cards in stream_pipeline("green hydrogen"):
+        ...  # first results within seconds, while the rest is still running
+
+Nothing touches disk unless an output directory is given (argument or
+$PIPELINE_OUTPUT_DIR). Each run then writes its own
+<dir>/<timestamp>_<keyword>_<id>/{resultsgen,flashcards}.json, so
+concurrent runs never share files.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+# Same import layout as app.py (news_pipeline modules import each other
+# top-level, e.g. `from config import ...`)
+ROOT = Path(__file__).parent
+sys.path.insert(0, str(ROOT / "flashcard_pipeline"))
+sys.path.insert(0, str(ROOT / "news_pipeline"))
+
+from news_pipeline.main import get_all_news
+from news_pipeline.streaming import stream_news
+from config import RESULTS_DB, RESULTS_MAX_AGE_SECONDS, RESULTS_PER_TOPIC
+from store import ResultsStore
+from flashcard_pipeline.main import generate_flashcards, save_flashcards, stream_flashcards
+
+PIPELINE_OUTPUT_DIR = os.getenv("PIPELINE_OUTPUT_DIR")
+
+def run_dir(output_dir, keyword):
+    """Fresh, unique directory for one run's files."""
+    slug = re.sub(r"[^a-z0-9]+", "_", keyword.lower()).strip("_")[:40] or "search"
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = Path(output_dir) / f"{stamp}_{slug}_{uuid.uuid4().hex[:8]}"
+    path.mkdir(parents=True)
+    return path
+
+def json_article(article):
+    """Copy of `article` without its (NumPy) embedding."""
+    return {k: v for k, v in article.items() if k != "embedding"}
+
+def json_articles(articles):
+    return [json_article(a) for a in articles]
+
+def run_pipeline(keyword, output_dir=PIPELINE_OUTPUT_DIR, generator=None):
+    """
+    Search news for `keyword` and generate flashcards for the results.
+    Returns (articles, flashcards); articles are JSON-ready copies.
+    """
+    articles = json_articles(get_all_news(keyword))
+
+    flashcards_path = None
+    if output_dir:
+        path = run_dir(output_dir, keyword)
+        with open(path / "resultsgen.json", "w") as f:
+            json.dump(articles, f, indent=2)
+        flashcards_path = str(path / "flashcards.json")
+
+    flashcards = generate_flashcards(articles, generator=generator, output_path=flashcards_path)
+    return articles, flashcards
+
+_store = None
+_store_lock = threading.Lock()
+
+def precomputed_articles(keyword, max_age=RESULTS_MAX_AGE_SECONDS):
+    """
+    The polling daemon's latest stored articles for `keyword`, or None if
+    it does not poll that topic or its last cycle is older than `max_age`.
+    """
+    global _store
+    if not os.path.exists(RESULTS_DB):
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = ResultsStore(RESULTS_DB)
+    updated = _store.updated_at(keyword.strip())
+    if updated is None or time.time() - updated > max_age:
+        return None
+    return _store.latest(keyword.strip(), RESULTS_PER_TOPIC)
+
+def stream_pipeline(keyword, output_dir=PIPELINE_OUTPUT_DIR, generator=None, new_only=False,
+                    articles=None):
+    """
+    Streaming run_pipeline: yields (article, flashcards) as each article
+    makes it through news processing and flashcard generation. Pass
+    `articles` (e.g. precomputed_articles) to skip the news stage. With an
+    output directory, the run's files are written once the stream ends.
+    """
+    if articles is None:
+        articles = (json_article(a) for a in stream_news(keyword, new_only=new_only))
+    seen, flashcards = [], []
+    for article, cards in stream_flashcards(articles, generator=generator):
+        seen.append(article)
+        flashcards.append(cards)
+        yield article, cards
+
+    if output_dir:
+        path = run_dir(output_dir, keyword)
+        with open(path / "resultsgen.json", "w") as f:
+            json.dump(seen, f, indent=2)
+        save_flashcards(flashcards, str(path / "flashcards.json"))
+
+if __name__ == "__main__":
+    keyword = " ".join(sys.argv[1:]) or input("Enter search keyword: ")
+    _, flashcards = run_pipeline(keyword)
+    print(f"\nGenerated {sum(len(f['flashcards']) for f in flashcards)} flashcards")